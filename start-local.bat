@@ -2,6 +2,10 @@
 echo Building and starting services...
 docker-compose down
 docker-compose build
+
+echo Checking JWT signing keys...
+docker-compose run --rm --no-deps --entrypoint python user_service -m app.scripts.generate_jwt_key --dir /run/secrets/jwt-keys --if-missing
+
 docker-compose up -d
 
 echo Waiting for services to be healthy...
@@ -1,7 +1,14 @@
 #!/bin/bash
 
-echo "Building and starting services..."
-docker-compose up -d --build
+echo "Building services..."
+docker-compose build
+
+echo "Checking JWT signing keys..."
+docker-compose run --rm --no-deps --entrypoint python user_service \
+    -m app.scripts.generate_jwt_key --dir /run/secrets/jwt-keys --if-missing
+
+echo "Starting services..."
+docker-compose up -d
 
 echo "Waiting for services to be healthy..."
 until docker-compose exec db pg_isready -U user -d user_db > /dev/null 2>&1; do
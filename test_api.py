@@ -4,6 +4,10 @@ import sys
 import random
 import string
 import os
+import base64
+import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 def generate_unique_email():
     """Generate a unique email with perlametro.cl domain"""
@@ -25,6 +29,9 @@ print(f"   URL Base: {API_BASE_URL}")
 print(f"   API Base: {API_BASE}")
 print()
 
+# Logins concurrentes del test de sobrecarga: deben superar la concurrencia y la cola de hashing
+OVERLOAD_BURST = int(os.environ.get('OVERLOAD_BURST', '200'))
+
 def print_request(method, url, payload=None):
     """Prints the outgoing request details."""
     print("="*80)
@@ -150,6 +157,7 @@ def test_auth():
     print_response(response)
     assert response.status_code == 200, "Admin login failed"
     admin_token = response.json()["access_token"]
+    admin_refresh_token = response.json()["refresh_token"]
     assert response.json()["is_admin"] is True, "Admin user should have admin flag"
     print("--- Admin login test passed ---\n")
 
@@ -187,6 +195,23 @@ def test_auth():
     assert "expires_at" in session_info, "Session should include expiration time"
     print("--- Session info test passed ---\n")
 
+    # 8. Refresh the access token
+    print("Step 8: Testing token refresh...")
+    refresh_payload = {"refresh_token": admin_refresh_token}
+    print_request("POST", f"{AUTH_URL}/refresh", refresh_payload)
+    response = requests.post(f"{AUTH_URL}/refresh", headers=HEADERS, json=refresh_payload)
+    print_response(response)
+    assert response.status_code == 200, "Failed to refresh token"
+    assert response.json()["refresh_token"] != admin_refresh_token, "Refresh token should rotate"
+    admin_headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    # 8.1 A rotated refresh token cannot be reused
+    print_request("POST", f"{AUTH_URL}/refresh", refresh_payload)
+    response = requests.post(f"{AUTH_URL}/refresh", headers=HEADERS, json=refresh_payload)
+    print_response(response)
+    assert response.status_code == 401, "Rotated refresh token should be rejected"
+    print("--- Token refresh test passed ---\n")
+
     return admin_headers
 
 def test_audit_logs(admin_headers):
@@ -248,9 +273,585 @@ def test_audit_logs(admin_headers):
     print_response(response)
     assert response.status_code == 403, "Regular user should not be able to access audit logs"
     print("--- Unauthorized audit logs access test passed ---\n")
+
+    # Revoke the regular user token and check it is no longer accepted
+    print("Step 4: Testing logout (token revocation)...")
+    print_request("POST", f"{API_BASE}/auth/logout", None)
+    response = requests.post(f"{API_BASE}/auth/logout", headers=user_headers)
+    print_response(response)
+    assert response.status_code == 204, "Logout should succeed"
+    print_request("GET", f"{API_BASE}/auth/session", None)
+    response = requests.get(f"{API_BASE}/auth/session", headers=user_headers)
+    print_response(response)
+    assert response.status_code == 401, "Revoked token should be rejected"
+    print("--- Logout test passed ---\n")
     
     print("✅ All audit logs tests passed successfully!\n")
 
+def test_import_users(admin_headers):
+    """Test bulk import: COPY into the staging table on PostgreSQL, duplicates and invalid rows."""
+    print("\nTESTING BULK IMPORT...")
+    print("="*80)
+
+    # 1. CSV with valid rows, a quoted name with a line break, a duplicate inside the file,
+    #    an already registered email and two invalid rows
+    print("Step 1: Importing a CSV file with duplicates and invalid rows...")
+    emails = [generate_unique_email() for _ in range(3)]
+    csv_content = (
+        "full_name,email,password\n"
+        f"Import One,{emails[0]},Password123!\n"
+        f'"Import\nTwo",{emails[1]},Password123!\n'
+        f"Import Three,{emails[2]},Password123!\n"
+        f"Repeated,{emails[0]},Password123!\n"
+        "Registered,admin@perlametro.cl,Password123!\n"
+        f"Invalid Email,{emails[0].replace('perlametro.cl', 'gmail.com')},Password123!\n"
+        f"Weak Password,{generate_unique_email()},weak\n"
+    )
+    import_headers = {"Authorization": admin_headers["Authorization"], "Content-Type": "text/csv"}
+    print_request("POST", f"{BASE_URL}/import", None)
+    response = requests.post(f"{BASE_URL}/import", headers=import_headers, data=csv_content.encode())
+    print_response(response)
+    assert response.status_code == 200, "Admin should be able to import users"
+    result = response.json()
+    assert result["total"] == 7, f"Expected 7 rows, got {result['total']}"
+    assert result["imported"] == 3, f"Expected 3 imported users, got {result['imported']}"
+    assert result["failed"] == 4, f"Expected 4 rejected rows, got {result['failed']}"
+    assert [error["row"] for error in result["errors"]] == [4, 5, 6, 7], "Unexpected rejected rows"
+    assert "repetido" in result["errors"][0]["errors"][0], "Row 4 repeats an email of the file"
+    assert "ya está registrado" in result["errors"][1]["errors"][0], "Row 5 uses a registered email"
+    print("--- CSV import test passed ---\n")
+
+    # 2. Imported users can log in with their password
+    print("Step 2: Logging in with an imported user...")
+    login_payload = {"email": emails[1], "password": "Password123!"}
+    print_request("POST", f"{AUTH_URL}/login", login_payload)
+    response = requests.post(f"{AUTH_URL}/login", headers=HEADERS, json=login_payload)
+    print_response(response)
+    assert response.status_code == 200, "Imported user should be able to log in"
+    print("--- Imported user login test passed ---\n")
+
+    # 3. Importing the same file again skips every row
+    print("Step 3: Importing the same file again...")
+    response = requests.post(f"{BASE_URL}/import", headers=import_headers, data=csv_content.encode())
+    print_response(response)
+    assert response.status_code == 200, "Re-import should succeed"
+    assert response.json()["imported"] == 0, "Already registered emails should be skipped"
+    assert response.json()["failed"] == 7, "Every row should be reported"
+    print("--- Re-import test passed ---\n")
+
+    print("✅ All bulk import tests passed successfully!\n")
+
+def jwt_header(token):
+    """Decodes the header of a JWT without verifying it."""
+    segment = token.split(".")[0]
+    return json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+
+def test_jwks(admin_headers):
+    """Test the public JWKS and the kid of issued tokens."""
+    print("\nTESTING JWKS...")
+    print("="*80)
+
+    # 1. Every token names (kid) a key published in the JWKS
+    print("Step 1: Checking the token kid against the JWKS...")
+    print_request("GET", f"{API_BASE_URL}/.well-known/jwks.json", None)
+    response = requests.get(f"{API_BASE_URL}/.well-known/jwks.json")
+    print_response(response)
+    assert response.status_code == 200, "JWKS should be public"
+    assert "max-age" in response.headers.get("Cache-Control", ""), "JWKS should be cacheable"
+    keys = response.json()["keys"]
+    assert keys, "JWKS should publish at least one key"
+    assert all(key["kty"] == "RSA" and key["use"] == "sig" and "d" not in key for key in keys), \
+        "JWKS should only publish public RSA signing keys"
+    kids = [key["kid"] for key in keys]
+    assert len(set(kids)) == len(kids), "Every key should have its own kid"
+    admin_token = admin_headers["Authorization"].replace("Bearer ", "")
+    header = jwt_header(admin_token)
+    assert header["kid"] in kids, "Tokens should be signed with a published key"
+    print("--- JWKS kid test passed ---\n")
+
+    # 2. A token that names an unknown key is rejected
+    print("Step 2: Sending a token with an unknown kid...")
+    forged_header = base64.urlsafe_b64encode(
+        json.dumps({**header, "kid": "unknown-kid"}).encode()
+    ).rstrip(b"=").decode()
+    forged_token = ".".join([forged_header] + admin_token.split(".")[1:])
+    response = requests.get(f"{AUTH_URL}/session", headers={"Authorization": f"Bearer {forged_token}"})
+    print_response(response)
+    assert response.status_code == 401, "A token with an unknown kid should be rejected"
+    print("--- Unknown kid test passed ---\n")
+
+    print("✅ All JWKS tests passed successfully!\n")
+
+def create_regular_user(full_name="Regular Test User"):
+    """Registers a regular user and logs in; returns its ID, token and headers."""
+    user_payload = {
+        "full_name": full_name,
+        "email": generate_unique_email(),
+        "password": "Password123!"
+    }
+    print_request("POST", f"{BASE_URL}/", user_payload)
+    response = requests.post(f"{BASE_URL}/", headers=HEADERS, json=user_payload)
+    print_response(response)
+    assert response.status_code == 200, "Failed to create test user"
+    user_id = response.json()["id"]
+    login_payload = {"email": user_payload["email"], "password": user_payload["password"]}
+    response = requests.post(f"{AUTH_URL}/login", headers=HEADERS, json=login_payload)
+    assert response.status_code == 200, "Login failed"
+    token = response.json()["access_token"]
+    return user_id, token, {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+
+def test_introspection(admin_headers):
+    """Test batch token introspection."""
+    print("\nTESTING TOKEN INTROSPECTION...")
+    print("="*80)
+
+    # 1. Results keep the order of the request
+    print("Step 1: Introspecting a batch of tokens...")
+    admin_token = admin_headers["Authorization"].replace("Bearer ", "")
+    regular_user_id, regular_token, regular_headers = create_regular_user()
+    introspect_payload = {"tokens": [admin_token, regular_token, "not-a-token"]}
+    print_request("POST", f"{AUTH_URL}/introspect", introspect_payload)
+    response = requests.post(f"{AUTH_URL}/introspect", headers=admin_headers, json=introspect_payload)
+    print_response(response)
+    assert response.status_code == 200, "Admin should be able to introspect tokens"
+    results = response.json()["results"]
+    assert [result["active"] for result in results] == [True, True, False], \
+        "Only the two issued tokens should be active"
+    assert results[0]["is_admin"] is True, "The admin token should be reported as admin"
+    assert results[1]["sub"] == regular_user_id, "Results should follow the order of the request"
+    assert results[1]["is_admin"] is False, "The regular token should not be admin"
+    print("--- Batch introspection test passed ---\n")
+
+    # 2. A revoked token is reported as inactive
+    print("Step 2: Introspecting a revoked token...")
+    response = requests.post(f"{AUTH_URL}/logout", headers=regular_headers)
+    assert response.status_code == 204, "Logout should succeed"
+    response = requests.post(f"{AUTH_URL}/introspect", headers=admin_headers, json={"tokens": [regular_token]})
+    print_response(response)
+    assert response.status_code == 200, "Admin should be able to introspect tokens"
+    assert response.json()["results"][0]["active"] is False, "A revoked token should be inactive"
+    print("--- Revoked token introspection test passed ---\n")
+
+    # 3. Introspection is reserved to administrators
+    print("Step 3: Introspecting with a regular user token...")
+    _, _, regular_headers = create_regular_user()
+    response = requests.post(f"{AUTH_URL}/introspect", headers=regular_headers, json=introspect_payload)
+    print_response(response)
+    assert response.status_code == 403, "Regular user should not be able to introspect tokens"
+    print("--- Introspection restriction test passed ---\n")
+
+    print("✅ All introspection tests passed successfully!\n")
+
+def test_batch_get(admin_headers):
+    """Test fetching several users by ID in one request."""
+    print("\nTESTING BATCH GET...")
+    print("="*80)
+
+    # 1. Users come back in request order and unknown IDs are reported
+    print("Step 1: Getting users by ID with a missing and a repeated ID...")
+    first_id, _, _ = create_regular_user("Batch First User")
+    second_id, _, _ = create_regular_user("Batch Second User")
+    missing_id = str(uuid.uuid4())
+    batch_payload = {"ids": [second_id, missing_id, first_id, second_id]}
+    print_request("POST", f"{BASE_URL}/batch-get", batch_payload)
+    response = requests.post(f"{BASE_URL}/batch-get", headers=admin_headers, json=batch_payload)
+    print_response(response)
+    assert response.status_code == 200, "Batch get should succeed"
+    result = response.json()
+    assert [user["id"] for user in result["users"]] == [second_id, first_id], \
+        "Users should follow the order of the request, repeated IDs once"
+    assert result["missing"] == [missing_id], "Unknown IDs should be reported as missing"
+    print("--- Batch get order test passed ---\n")
+
+    # 2. Deleted users are reported as missing
+    print("Step 2: Getting a deleted user by ID...")
+    response = requests.delete(f"{BASE_URL}/{first_id}", headers=admin_headers)
+    assert response.status_code == 200, "Admin should be able to delete users"
+    response = requests.post(f"{BASE_URL}/batch-get", headers=admin_headers, json={"ids": [first_id, second_id]})
+    print_response(response)
+    assert response.status_code == 200, "Batch get should succeed"
+    assert [user["id"] for user in response.json()["users"]] == [second_id], "Deleted users should not be returned"
+    assert response.json()["missing"] == [first_id], "Deleted users should be reported as missing"
+    print("--- Batch get deleted user test passed ---\n")
+
+    # 3. Authentication is required
+    print("Step 3: Batch get without authentication...")
+    response = requests.post(f"{BASE_URL}/batch-get", headers=HEADERS, json=batch_payload)
+    print_response(response)
+    assert response.status_code == 401, "Batch get should require authentication"
+    print("--- Batch get authentication test passed ---\n")
+
+    print("✅ All batch get tests passed successfully!\n")
+
+def test_cursor_pagination(admin_headers):
+    """Test keyset pagination of the user list with X-Next-Cursor."""
+    print("\nTESTING CURSOR PAGINATION...")
+    print("="*80)
+
+    # 1. Following the cursor walks every user once
+    print("Step 1: Walking the user list with X-Next-Cursor...")
+    print_request("GET", f"{BASE_URL}/?limit=2", None)
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 2})
+    print_response(response)
+    assert response.status_code == 200, "Listing should succeed"
+    assert len(response.json()) == 2, "The first page should have two users"
+    assert "X-Next-Cursor" in response.headers, "A full page should have a next cursor"
+    users = response.json()
+    pages = 1
+    while "X-Next-Cursor" in response.headers:
+        response = requests.get(
+            f"{BASE_URL}/", headers=admin_headers,
+            params={"limit": 50, "cursor": response.headers["X-Next-Cursor"]}
+        )
+        assert response.status_code == 200, "Following the cursor should succeed"
+        users.extend(response.json())
+        pages += 1
+    print(f"<-- {len(users)} users in {pages} pages")
+    user_ids = [user["id"] for user in users]
+    assert len(set(user_ids)) == len(user_ids), "No user should appear in two pages"
+    created = [user["created_at"] for user in users]
+    assert created == sorted(created), "Users should be ordered by creation date"
+    print("--- Cursor pagination test passed ---\n")
+
+    # 2. An invalid cursor is rejected
+    print("Step 2: Sending an invalid cursor...")
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"cursor": "not-a-cursor"})
+    print_response(response)
+    assert response.status_code == 400, "An invalid cursor should be rejected"
+    print("--- Invalid cursor test passed ---\n")
+
+    # 3. limit=0 returns an empty page
+    print("Step 3: Listing with limit=0...")
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 0})
+    print_response(response)
+    assert response.status_code == 200, "Listing with limit=0 should succeed"
+    assert response.json() == [], "limit=0 should return no users"
+    assert "X-Next-Cursor" not in response.headers, "An empty page should have no cursor"
+    print("--- Empty page test passed ---\n")
+
+    print("✅ All cursor pagination tests passed successfully!\n")
+
+def test_search(admin_headers):
+    """Test full-text search over user name and email."""
+    print("\nTESTING USER SEARCH...")
+    print("="*80)
+
+    # Una palabra inventada para que la búsqueda solo encuentre a estos usuarios
+    tag = "srch" + "".join(random.choices(string.ascii_lowercase, k=8))
+    alfa_id, _, _ = create_regular_user(f"{tag.capitalize()} Alfaro")
+    beta_id, _, _ = create_regular_user(f"{tag.capitalize()} Betancourt")
+
+    # 1. Every word must match the beginning of a word
+    print("Step 1: Searching by name prefixes...")
+    print_request("GET", f"{BASE_URL}/search?q={tag} alf", None)
+    response = requests.get(f"{BASE_URL}/search", headers=admin_headers, params={"q": f"{tag} alf"})
+    print_response(response)
+    assert response.status_code == 200, "Search should succeed"
+    assert [user["id"] for user in response.json()] == [alfa_id], "Only the matching user should be found"
+    response = requests.get(f"{BASE_URL}/search", headers=admin_headers, params={"q": tag.upper()})
+    assert response.status_code == 200, "Search should succeed"
+    assert {user["id"] for user in response.json()} == {alfa_id, beta_id}, "Search should ignore case"
+    print("--- Prefix search test passed ---\n")
+
+    # 2. Results are paged with X-Next-Cursor
+    print("Step 2: Paging the search results...")
+    response = requests.get(f"{BASE_URL}/search", headers=admin_headers, params={"q": tag, "limit": 1})
+    print_response(response)
+    assert len(response.json()) == 1, "The first page should have one user"
+    assert "X-Next-Cursor" in response.headers, "A full page should have a next cursor"
+    first = response.json()[0]["id"]
+    response = requests.get(
+        f"{BASE_URL}/search", headers=admin_headers,
+        params={"q": tag, "limit": 1, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    print_response(response)
+    assert response.status_code == 200, "Following the cursor should succeed"
+    assert {first, response.json()[0]["id"]} == {alfa_id, beta_id}, "The second page should have the other user"
+    response = requests.get(f"{BASE_URL}/search", headers=admin_headers, params={"q": tag, "limit": 0})
+    assert response.json() == [], "limit=0 should return no users"
+    print("--- Search pagination test passed ---\n")
+
+    # 3. A query without words is rejected
+    print("Step 3: Searching without words...")
+    response = requests.get(f"{BASE_URL}/search", headers=admin_headers, params={"q": "!!"})
+    print_response(response)
+    assert response.status_code == 400, "A query without words should be rejected"
+    print("--- Empty search test passed ---\n")
+
+    print("✅ All search tests passed successfully!\n")
+
+def test_count_modes(admin_headers):
+    """Test the X-Total-Count header of the user list in every count mode."""
+    print("\nTESTING COUNT MODES...")
+    print("="*80)
+
+    # 1. The exact count matches the users reachable with the cursor
+    print("Step 1: Comparing the exact count with the listed users...")
+    print_request("GET", f"{BASE_URL}/?count=exact&limit=1", None)
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 1, "count": "exact"})
+    print_response(response)
+    assert response.status_code == 200, "Listing with count should succeed"
+    assert response.headers.get("X-Total-Count-Mode") == "exact", "count=exact should report an exact count"
+    total = int(response.headers["X-Total-Count"])
+    listed = len(response.json())
+    while "X-Next-Cursor" in response.headers:
+        response = requests.get(
+            f"{BASE_URL}/", headers=admin_headers,
+            params={"limit": 100, "cursor": response.headers["X-Next-Cursor"]}
+        )
+        listed += len(response.json())
+    print(f"<-- X-Total-Count {total}, {listed} users listed")
+    # Otros clientes pueden registrar usuarios mientras se recorre el listado
+    assert listed >= total, "The count should not exceed the listed users"
+    print("--- Exact count test passed ---\n")
+
+    # 2. Capped and estimated counts report how they were obtained
+    print("Step 2: Testing capped and estimated counts...")
+    for mode, accepted in (("capped", ("exact", "capped")), ("estimated", ("exact", "capped", "estimated"))):
+        response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 1, "count": mode})
+        print(f"<-- count={mode}: {response.status_code} "
+              f"{response.headers.get('X-Total-Count')} ({response.headers.get('X-Total-Count-Mode')})")
+        assert response.status_code == 200, f"count={mode} should succeed"
+        assert response.headers.get("X-Total-Count-Mode") in accepted, f"Unexpected mode for count={mode}"
+        assert int(response.headers["X-Total-Count"]) > 0, f"count={mode} should report the users"
+    print("--- Capped and estimated count test passed ---\n")
+
+    # 3. Without count there is no total
+    print("Step 3: Listing without count...")
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 1})
+    assert "X-Total-Count" not in response.headers, "The total should only be sent when requested"
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"count": "approximate"})
+    print_response(response)
+    assert response.status_code == 422, "An unknown count mode should be rejected"
+    print("--- Count mode validation test passed ---\n")
+
+    print("✅ All count mode tests passed successfully!\n")
+
+def test_last_admin(admin_headers):
+    """Test that the last administrator cannot be deleted."""
+    print("\nTESTING LAST ADMIN PROTECTION...")
+    print("="*80)
+
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 100})
+    users = response.json()
+    while "X-Next-Cursor" in response.headers:
+        response = requests.get(
+            f"{BASE_URL}/", headers=admin_headers,
+            params={"limit": 100, "cursor": response.headers["X-Next-Cursor"]}
+        )
+        users.extend(response.json())
+    admins = [user for user in users if user["is_admin"]]
+    if len(admins) != 1:
+        # Con otro administrador la eliminación sería válida: no se borra una cuenta real
+        print(f"Skipping: {len(admins)} administrators registered\n")
+        return
+
+    print("Step 1: Deleting the only administrator...")
+    admin_id = admins[0]["id"]
+    print_request("DELETE", f"{BASE_URL}/{admin_id}", None)
+    response = requests.delete(f"{BASE_URL}/{admin_id}", headers=admin_headers)
+    print_response(response)
+    assert response.status_code == 400, "The last administrator should not be deleted"
+    response = requests.get(f"{BASE_URL}/{admin_id}", headers=admin_headers)
+    assert response.status_code == 200, "The administrator should still exist"
+    print("--- Last admin protection test passed ---\n")
+
+    print("✅ All last admin tests passed successfully!\n")
+
+def test_export_users(admin_headers):
+    """Test the streamed export in NDJSON and CSV."""
+    print("\nTESTING USER EXPORT...")
+    print("="*80)
+
+    # 1. NDJSON: one user per line
+    print("Step 1: Exporting users as NDJSON...")
+    print_request("GET", f"{BASE_URL}/export?format=ndjson", None)
+    response = requests.get(f"{BASE_URL}/export", headers=admin_headers, params={"format": "ndjson"})
+    print(f"<-- STATUS CODE: {response.status_code}")
+    assert response.status_code == 200, "Admin should be able to export users"
+    assert response.headers["Content-Type"].startswith("application/x-ndjson"), "Unexpected content type"
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert users, "The export should include the seeded users"
+    assert all(set(user) == {"id", "full_name", "email", "is_active", "is_admin", "created_at"} for user in users), \
+        "Every exported user should have the export columns"
+    assert "admin@perlametro.cl" in {user["email"] for user in users}, "The export should include the admin"
+    assert len({user["id"] for user in users}) == len(users), "Every user should be exported once"
+    print("--- NDJSON export test passed ---\n")
+
+    # 2. CSV: header plus the same users
+    print("Step 2: Exporting users as CSV...")
+    print_request("GET", f"{BASE_URL}/export?format=csv", None)
+    response = requests.get(f"{BASE_URL}/export", headers=admin_headers, params={"format": "csv"})
+    print(f"<-- STATUS CODE: {response.status_code}")
+    assert response.status_code == 200, "Admin should be able to export users as CSV"
+    assert response.headers["Content-Type"].startswith("text/csv"), "Unexpected content type"
+    lines = response.text.splitlines()
+    assert lines[0] == "id,full_name,email,is_active,is_admin,created_at", "Unexpected CSV header"
+    assert "admin@perlametro.cl" in response.text, "The CSV export should include the admin"
+    print("--- CSV export test passed ---\n")
+
+    # 3. Regular users cannot export
+    print("Step 3: Exporting with a regular user token...")
+    _, _, regular_headers = create_regular_user()
+    response = requests.get(f"{BASE_URL}/export", headers=regular_headers)
+    print_response(response)
+    assert response.status_code == 403, "Regular user should not be able to export users"
+    print("--- Export restriction test passed ---\n")
+
+    print("✅ All export tests passed successfully!\n")
+
+def test_sparse_fields(admin_headers):
+    """Test responses with only the fields requested in `fields`."""
+    print("\nTESTING SPARSE FIELDS...")
+    print("="*80)
+
+    # 1. The list returns only the requested fields
+    print("Step 1: Listing users with fields=id,email...")
+    print_request("GET", f"{BASE_URL}/?fields=id,email&limit=5", None)
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"fields": "id,email", "limit": 5})
+    print_response(response)
+    assert response.status_code == 200, "Listing with fields should succeed"
+    assert response.json(), "The list should not be empty"
+    assert all(set(user) == {"id", "email"} for user in response.json()), "Only the requested fields should be returned"
+    print("--- List fields test passed ---\n")
+
+    # 2. A single user with one field
+    print("Step 2: Reading a user with fields=full_name...")
+    user_id = response.json()[0]["id"]
+    response = requests.get(f"{BASE_URL}/{user_id}", headers=admin_headers, params={"fields": "full_name"})
+    print_response(response)
+    assert response.status_code == 200, "Reading a user with fields should succeed"
+    assert list(response.json()) == ["full_name"], "Only the requested field should be returned"
+    print("--- User fields test passed ---\n")
+
+    # 3. Unknown or hidden fields are rejected
+    print("Step 3: Requesting an unknown field...")
+    response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"fields": "id,hashed_password"})
+    print_response(response)
+    assert response.status_code == 400, "Unknown fields should be rejected"
+    print("--- Unknown field test passed ---\n")
+
+    print("✅ All sparse fields tests passed successfully!\n")
+
+def test_conditional_requests(admin_headers):
+    """Test ETag, If-None-Match (304) and If-Match (412) on users and on the list."""
+    print("\nTESTING CONDITIONAL REQUESTS...")
+    print("="*80)
+
+    # 1. A user's ETag answers If-None-Match with 304
+    print("Step 1: Reading a user with If-None-Match...")
+    user_id, _, user_headers = create_regular_user("Conditional Test User")
+    response = requests.get(f"{BASE_URL}/{user_id}", headers=user_headers)
+    print_response(response)
+    assert response.status_code == 200, "Failed to read the user"
+    etag = response.headers["ETag"]
+    response = requests.get(f"{BASE_URL}/{user_id}", headers={**user_headers, "If-None-Match": etag})
+    print(f"<-- STATUS CODE: {response.status_code}")
+    assert response.status_code == 304, "An unchanged user should answer 304"
+    assert not response.content, "A 304 response should have no body"
+    print("--- User If-None-Match test passed ---\n")
+
+    # 2. An update without changes keeps the ETag
+    print("Step 2: Updating the user without changes...")
+    update_payload = {"full_name": "Conditional Test User"}
+    response = requests.put(f"{BASE_URL}/{user_id}", headers={**user_headers, "If-Match": etag}, json=update_payload)
+    print_response(response)
+    assert response.status_code == 200, "An update without changes should succeed"
+    assert response.headers["ETag"] == etag, "An update without changes should keep the ETag"
+    print("--- No-op update test passed ---\n")
+
+    # 3. If-Match applies the update and returns the new ETag; the old one is then stale
+    print("Step 3: Updating the user with If-Match...")
+    update_payload = {"full_name": "Updated Conditional User"}
+    print_request("PUT", f"{BASE_URL}/{user_id}", update_payload)
+    response = requests.put(f"{BASE_URL}/{user_id}", headers={**user_headers, "If-Match": etag}, json=update_payload)
+    print_response(response)
+    assert response.status_code == 200, "Update with the current ETag should succeed"
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag, "The ETag should change with the update"
+    response = requests.put(
+        f"{BASE_URL}/{user_id}", headers={**user_headers, "If-Match": etag}, json={"full_name": "Lost Update"}
+    )
+    print_response(response)
+    assert response.status_code == 412, "Update with a stale ETag should fail"
+    response = requests.delete(f"{BASE_URL}/{user_id}", headers={**admin_headers, "If-Match": etag})
+    print_response(response)
+    assert response.status_code == 412, "Delete with a stale ETag should fail"
+    response = requests.get(f"{BASE_URL}/{user_id}", headers=user_headers)
+    assert response.json()["full_name"] == "Updated Conditional User", "Stale requests should not change the user"
+    print("--- If-Match test passed ---\n")
+
+    # 4. The list gets an ETag once the last write settles
+    print("Step 4: Reading the user list with If-None-Match...")
+    for _ in range(60):
+        response = requests.get(f"{BASE_URL}/", headers=admin_headers, params={"limit": 5})
+        if "ETag" in response.headers:
+            break
+        time.sleep(0.5)
+    assert "ETag" in response.headers, "The user list should have an ETag once writes settle"
+    list_etag = response.headers["ETag"]
+    response = requests.get(f"{BASE_URL}/", headers={**admin_headers, "If-None-Match": list_etag}, params={"limit": 5})
+    print(f"<-- STATUS CODE: {response.status_code}")
+    assert response.status_code == 304, "An unchanged list should answer 304"
+    response = requests.get(f"{BASE_URL}/", headers={**admin_headers, "If-None-Match": list_etag}, params={"limit": 6})
+    print(f"<-- STATUS CODE: {response.status_code}")
+    assert response.status_code == 200, "Other query parameters should have another ETag"
+    print("--- List If-None-Match test passed ---\n")
+
+    # 5. Any write changes the list ETag
+    print("Step 5: Checking the list ETag after a write...")
+    requests.put(f"{BASE_URL}/{user_id}", headers=user_headers, json={"full_name": "Changed Again"})
+    response = requests.get(f"{BASE_URL}/", headers={**admin_headers, "If-None-Match": list_etag}, params={"limit": 5})
+    print(f"<-- STATUS CODE: {response.status_code}")
+    assert response.status_code == 200, "The list should change after a write"
+    assert response.headers.get("ETag") != list_etag, "The list ETag should change after a write"
+    print("--- List ETag change test passed ---\n")
+
+    print("✅ All conditional request tests passed successfully!\n")
+
+def test_overload(admin_headers):
+    """Test that password hashing sheds load with 503 and Retry-After instead of queuing."""
+    print("\nTESTING OVERLOAD PROTECTION...")
+    print("="*80)
+
+    # 1. A burst of logins beyond the hashing capacity gets 503 + Retry-After
+    print(f"Step 1: Sending {OVERLOAD_BURST} concurrent logins...")
+    login_payload = {"email": "admin@perlametro.cl", "password": "WrongPassword123!"}
+
+    def attempt(_):
+        return requests.post(f"{AUTH_URL}/login", headers=HEADERS, json=login_payload)
+
+    with ThreadPoolExecutor(max_workers=OVERLOAD_BURST) as executor:
+        responses = list(executor.map(attempt, range(OVERLOAD_BURST)))
+    statuses = [response.status_code for response in responses]
+    shed = [response for response in responses if response.status_code == 503]
+    print(f"<-- {statuses.count(401)} x 401, {len(shed)} x 503")
+    assert set(statuses) <= {401, 503}, f"Unexpected status codes: {sorted(set(statuses))}"
+    assert shed, "Some logins should be rejected while hashing is saturated"
+    retry_after = max(int(response.headers["Retry-After"]) for response in shed)
+    assert retry_after >= 1, "Retry-After should be at least one second"
+    print("--- Load shedding test passed ---\n")
+
+    # 2. The rejections show up in the metrics
+    print("Step 2: Checking the hashing metrics...")
+    response = requests.get(f"{API_BASE}/metrics/", headers=admin_headers)
+    print_response(response)
+    assert response.status_code == 200, "Admin should be able to read the metrics"
+    assert response.json()["password_hashing"]["shed"] >= len(shed), "Rejected logins should be counted"
+    print("--- Overload metrics test passed ---\n")
+
+    # 3. After Retry-After the service accepts logins again
+    print(f"Step 3: Logging in again after {retry_after}s...")
+    time.sleep(retry_after)
+    response = requests.post(
+        f"{AUTH_URL}/login", headers=HEADERS, json={"email": "admin@perlametro.cl", "password": "Password123!"}
+    )
+    print_response(response)
+    assert response.status_code == 200, "Login should succeed after Retry-After"
+    print("--- Recovery after overload test passed ---\n")
+
+    print("✅ All overload tests passed successfully!\n")
+
 def test_api():
     """Runs a sequence of API tests."""
     global HEADERS  # Para poder modificar los headers globales
@@ -386,6 +987,18 @@ def test_api():
         # Finally, test the audit logs endpoint
         admin_headers = {"Content-Type": "application/json", "Authorization": "Bearer " + admin_token}
         test_audit_logs(admin_headers)
+        test_import_users(admin_headers)
+        test_jwks(admin_headers)
+        test_introspection(admin_headers)
+        test_batch_get(admin_headers)
+        test_cursor_pagination(admin_headers)
+        test_search(admin_headers)
+        test_count_modes(admin_headers)
+        test_last_admin(admin_headers)
+        test_export_users(admin_headers)
+        test_sparse_fields(admin_headers)
+        test_conditional_requests(admin_headers)
+        test_overload(admin_headers)
         
         print("✅ All tests passed successfully!")
 
@@ -0,0 +1,115 @@
+"""
+ETags y peticiones condicionales para los usuarios.
+
+El ETag de un usuario se deriva de `updated_at`, que cambia con cada
+escritura; el de un listado, de la última modificación de cualquier usuario
+(ver `CRUDUser.get_version`) y de los parámetros de la consulta. Con
+`If-None-Match` un cliente que ya tiene la representación recibe un 304 sin
+cuerpo; con `If-Match` una actualización o eliminación solo se aplica si el
+usuario no cambió desde que el cliente lo leyó (412 en caso contrario).
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+
+ETAG_HEADER = "ETag"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _micros(value: datetime) -> int:
+    # SQLite devuelve fechas sin zona horaria; se guardan en UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode(), digest_size=8).hexdigest()
+
+
+def user_etag(updated_at: datetime, fields: Optional[Sequence[str]] = None) -> str:
+    """
+    ETag fuerte de un usuario.
+
+    Args:
+        updated_at: Fecha de la última modificación del usuario
+        fields: Campos de la respuesta parcial, si se pidió `fields`
+
+    Returns:
+        `"<microsegundos en hexadecimal>"`, con un sufijo por cada conjunto de
+        campos: cada representación del usuario tiene su propio ETag
+    """
+    tag = format(_micros(updated_at), "x")
+    if fields:
+        tag = f"{tag}-{_digest(','.join(fields))}"
+    return f'"{tag}"'
+
+
+def collection_etag(version: datetime, request: Request) -> str:
+    """
+    ETag fuerte de un listado: versión de la colección y parámetros de la consulta.
+
+    Los parámetros se ordenan, así `?a=1&b=2` y `?b=2&a=1` comparten ETag.
+    """
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    return f'"v{_micros(version):x}-{_digest(params)}"'
+
+
+def _tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Indica si `If-None-Match` incluye el ETag actual (comparación débil).
+
+    Returns:
+        True si el cliente ya tiene esta representación y corresponde un 304
+    """
+    if not if_none_match:
+        return False
+    for tag in _tags(if_none_match):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo con el ETag actual."""
+    return Response(status_code=304, headers={ETAG_HEADER: etag})
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[List[datetime]]:
+    """
+    Interpreta `If-Match` como las versiones (`updated_at`) aceptadas.
+
+    Solo valen ETags fuertes de la representación completa del usuario
+    (comparación fuerte): un ETag débil o de una respuesta con `fields` nunca
+    coincide.
+
+    Returns:
+        Versiones aceptadas, o None si no hay condición (sin header o `*`)
+
+    Raises:
+        HTTPException: 412 si ningún ETag puede coincidir
+    """
+    if not if_match:
+        return None
+    versions = []
+    for tag in _tags(if_match):
+        if tag == "*":
+            return None
+        if len(tag) < 3 or not (tag.startswith('"') and tag.endswith('"')):
+            continue
+        try:
+            micros = int(tag[1:-1], 16)
+            versions.append(EPOCH + timedelta(microseconds=micros))
+        except (ValueError, OverflowError):
+            continue
+    if not versions:
+        raise HTTPException(status_code=412, detail="If-Match no coincide con la versión actual del usuario")
+    return versions
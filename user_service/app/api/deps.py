@@ -1,8 +1,9 @@
-from app.core.database import SessionLocal
+from typing import AsyncIterator
 
-def get_db():
-    db = SessionLocal()
-    try:
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
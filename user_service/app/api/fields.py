@@ -0,0 +1,67 @@
+"""
+Campos parciales (sparse fieldsets) en las respuestas de usuarios.
+
+Con `?fields=id,email` la consulta lee solo esas columnas, sin construir
+objetos del ORM ni leer la contraseña hasheada, y la respuesta se serializa
+directamente desde las filas, sin validar cada usuario con el schema `User`.
+"""
+
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import pydantic_core
+from fastapi import HTTPException, Response
+
+from app.schemas.user import User
+
+# Campos que se pueden pedir: los de la respuesta completa
+USER_FIELDS = tuple(User.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Interpreta el parámetro `fields` (nombres separados por comas).
+
+    Returns:
+        Campos pedidos en el orden de USER_FIELDS, o None si no se indicó `fields`
+
+    Raises:
+        HTTPException: 400 si incluye campos desconocidos o ninguno
+    """
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(USER_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconocidos: {', '.join(sorted(unknown))}. "
+                   f"Campos disponibles: {', '.join(USER_FIELDS)}"
+        )
+    if not requested:
+        raise HTTPException(status_code=400, detail="fields debe incluir al menos un campo")
+    return tuple(field for field in USER_FIELDS if field in requested)
+
+
+def _partial(row: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    mapping = row._mapping
+    return {field: mapping[field] for field in fields}
+
+
+def fields_response(
+    rows: Any, fields: Sequence[str], headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """
+    Serializa una fila o una lista de filas con solo los campos pedidos.
+
+    Usa el mismo serializador de pydantic que la respuesta completa (mismo
+    formato de fechas y UUID), pero sin validar cada fila contra el schema.
+    """
+    if isinstance(rows, list):
+        content = [_partial(row, fields) for row in rows]
+    else:
+        content = _partial(rows, fields)
+    return Response(
+        content=pydantic_core.to_json(content),
+        media_type="application/json",
+        headers=dict(headers or {}),
+    )
@@ -0,0 +1,89 @@
+"""
+Cursores opacos para la paginación por keyset.
+
+Un cursor codifica los valores de la clave de orden de la última fila
+entregada (por ejemplo `(created_at, id)`); la página siguiente se pide con
+`WHERE (created_at, id) > (:created_at, :id)`, que usa el índice y cuesta lo
+mismo en la página 1 que en la 10.000, a diferencia de OFFSET.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Literal, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+# Header con el cursor de la página siguiente (ausente en la última página)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Total de resultados del listado y cómo se obtuvo: "exact", "estimated" o
+# "capped" (se alcanzó el tope; hay al menos esa cantidad)
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_COUNT_MODE_HEADER = "X-Total-Count-Mode"
+
+# Modos de conteo que un cliente puede pedir con `?count=`
+CountMode = Literal["exact", "estimated", "capped"]
+
+RowType = TypeVar("RowType")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Codifica los valores de la clave de orden como un token URL-safe."""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+
+    Args:
+        cursor: Token recibido del cliente
+        size: Cantidad de valores esperada
+
+    Returns:
+        Valores en su forma JSON (el llamador los convierte a su tipo)
+
+    Raises:
+        HTTPException: 400 si el cursor está mal formado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+def page_size(limit: int) -> int:
+    """
+    Filas a pedir a la base de datos para una página de `limit` filas.
+
+    Se pide una fila extra para saber si hay una página siguiente; con
+    `limit` 0 no se pide ninguna.
+    """
+    return limit + 1 if limit > 0 else limit
+
+
+def split_page(rows: Sequence[RowType], limit: int) -> Tuple[List[RowType], bool]:
+    """
+    Separa la fila extra pedida con `page_size`.
+
+    Returns:
+        Tupla (filas de la página, True si hay una página siguiente)
+    """
+    if limit > 0 and len(rows) > limit:
+        return list(rows[:limit]), True
+    return list(rows), False
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, auth, audit
+from app.api.v1.endpoints import users, auth, audit, metrics
 
 api_router = APIRouter()
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(audit.router, prefix="/audit-logs", tags=["audit"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.api import deps
 from app.crud import crud_audit
@@ -11,7 +11,7 @@ router = APIRouter()
 @router.get("/", response_model=List[AuditLog])
 async def get_audit_logs(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     authorization: Optional[str] = Header(None),
 ):
     """
@@ -38,4 +38,4 @@ async def get_audit_logs(
             detail="Se requieren privilegios de administrador para acceder a los logs de auditoría"
         )
     
-    return crud_audit.get_all_logs(db)
+    return await crud_audit.get_all_logs(db)
@@ -2,21 +2,32 @@
 Endpoints relacionados con autenticación y manejo de sesiones.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.core.auth import (
     create_access_token,
-    verify_password,
     get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from app.schemas.auth import LoginRequest, LoginResponse, SessionInfo
+from app.core import hashing
+from app.core.config import settings
+from app.core.database import use_primary
+from app.core.revocation import revocation_list
+from app.schemas.auth import (
+    IntrospectRequest,
+    IntrospectResponse,
+    LoginRequest,
+    LoginResponse,
+    RefreshRequest,
+    SessionInfo,
+    TokenIntrospection,
+)
 from app.api import deps
-from app.crud import crud_user
+from app.crud import crud_user, crud_session, crud_revoked_token
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -24,36 +35,100 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 @router.post("/login", response_model=LoginResponse)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     """
-    Inicia sesión y retorna un token JWT.
+    Inicia sesión y retorna un token JWT junto con un refresh token.
     """
     # Buscar usuario por email y verificar credenciales
     # Nota: Siempre retornamos el mismo mensaje de error para no revelar si el usuario existe
-    user = crud_user.get_user_by_email(db, email=login_data.email)
+    # Se lee del primario: una réplica atrasada rechazaría a un usuario recién creado
+    use_primary(db)
+    user = await crud_user.get_user_by_email(db, email=login_data.email)
     if not user:
         raise HTTPException(
             status_code=401,
             detail="Credenciales incorrectas"
         )
     
-    # Verificar contraseña
-    if not verify_password(login_data.password, user.hashed_password):
+    # Verificar contraseña (en el pool de hashing, sin bloquear el event loop)
+    valid, new_hash = await hashing.verify_and_update(login_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=401,
             detail="Credenciales incorrectas"
         )
     
-    # Crear token
+    # Migrar el hash a la política vigente (esquema/costo) sin migración masiva
+    if new_hash:
+        user = await crud_user.update(db, db_obj=user, obj_in={"hashed_password": new_hash})
+    
+    # Crear tokens
     access_token = create_access_token(
         subject=str(user.id),
         is_admin=user.is_admin,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
+    refresh_token, _ = await crud_session.create_session(db, user_id=user.id)
     
     return LoginResponse(
         access_token=access_token,
+        refresh_token=refresh_token,
+        user_id=str(user.id),
+        email=user.email,
+        is_admin=user.is_admin
+    )
+
+@router.post("/refresh", response_model=LoginResponse)
+async def refresh(
+    refresh_data: RefreshRequest,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    Renueva el token de acceso con un refresh token, sin volver a enviar la contraseña.
+    
+    El refresh token es de un solo uso: la respuesta incluye uno nuevo. Presentar
+    un token ya utilizado revoca todas las sesiones derivadas del mismo login.
+    """
+    session = await crud_session.get_by_token(db, token=refresh_data.refresh_token)
+    if not session:
+        raise HTTPException(
+            status_code=401,
+            detail="Refresh token inválido o expirado"
+        )
+    
+    # Un token ya rotado solo puede reaparecer si fue robado: se revoca la familia
+    if session.revoked_at is not None:
+        await crud_session.revoke_family(db, family_id=session.family_id)
+        raise HTTPException(
+            status_code=401,
+            detail="Refresh token inválido o expirado"
+        )
+    
+    user = await crud_user.get(db, id=session.user_id)
+    if not user:
+        await crud_session.revoke_family(db, family_id=session.family_id)
+        raise HTTPException(
+            status_code=401,
+            detail="Refresh token inválido o expirado"
+        )
+    
+    refresh_token = await crud_session.rotate(db, session=session)
+    if not refresh_token:
+        raise HTTPException(
+            status_code=401,
+            detail="Refresh token inválido o expirado"
+        )
+    
+    access_token = create_access_token(
+        subject=str(user.id),
+        is_admin=user.is_admin,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    
+    return LoginResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
         user_id=str(user.id),
         email=user.email,
         is_admin=user.is_admin
@@ -85,3 +160,96 @@ async def get_session(authorization: Optional[str] = Header(None)):
         is_admin=token_data.is_admin,
         expires_at=datetime.fromtimestamp(token_data.exp).isoformat()
     )
+
+@router.post("/logout", status_code=204)
+async def logout(
+    logout_data: Optional[RefreshRequest] = None,
+    db: AsyncSession = Depends(deps.get_db),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Cierra la sesión revocando el token de acceso actual antes de su expiración.
+    
+    Si se envía el refresh token, también se revocan todas las sesiones de su familia.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=401,
+            detail="Token no proporcionado o formato inválido"
+        )
+    
+    token = authorization.split(" ")[1]
+    token_data = await get_current_user(token)
+    
+    if not token_data:
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido o expirado"
+        )
+    
+    # Los tokens emitidos antes de incluir jti no se pueden revocar; expiran solos
+    if token_data.jti:
+        expires_at = datetime.fromtimestamp(token_data.exp, tz=timezone.utc)
+        await crud_revoked_token.revoke(db, jti=token_data.jti, expires_at=expires_at)
+        revocation_list.add(token_data.jti, expires_at)
+    
+    if logout_data:
+        session = await crud_session.get_by_token(db, token=logout_data.refresh_token)
+        if session and str(session.user_id) == token_data.sub:
+            await crud_session.revoke_family(db, family_id=session.family_id)
+    
+    return Response(status_code=204)
+
+@router.post("/introspect", response_model=IntrospectResponse)
+async def introspect(
+    introspect_data: IntrospectRequest,
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Valida un lote de tokens en una sola petición. Solo para administradores
+    (cuentas de servicio de gateways y servicios internos).
+    
+    Cada token se valida igual que en cualquier endpoint autenticado (firma,
+    expiración y revocación); los resultados respetan el orden de la solicitud.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=401,
+            detail="Token no proporcionado o formato inválido"
+        )
+    
+    token = authorization.split(" ")[1]
+    token_data = await get_current_user(token)
+    
+    if not token_data:
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido o expirado"
+        )
+    
+    if not token_data.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Se requieren privilegios de administrador para introspección de tokens"
+        )
+    
+    if len(introspect_data.tokens) > settings.INTROSPECT_MAX_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote no puede superar {settings.INTROSPECT_MAX_BATCH} tokens"
+        )
+    
+    results = []
+    for candidate in introspect_data.tokens:
+        payload = await get_current_user(candidate)
+        if payload is None:
+            results.append(TokenIntrospection(active=False))
+        else:
+            results.append(TokenIntrospection(
+                active=True,
+                sub=payload.sub,
+                is_admin=payload.is_admin,
+                exp=payload.exp
+            ))
+    
+    return IntrospectResponse(results=results)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Header
+from typing import Any, Dict, Optional
+from app.core.auth import get_current_user, token_cache
+from app.core.database import async_engine, pool_metrics, replica_set
+from app.core.hashing import hashing_executor
+from app.core.revocation import revocation_list
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics(
+    *,
+    authorization: Optional[str] = Header(None),
+) -> Dict[str, Any]:
+    """
+    Get runtime metrics of this worker. Only accessible by administrators.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=401,
+            detail="Token no proporcionado o formato inválido"
+        )
+    
+    token = authorization.split(" ")[1]
+    token_data = await get_current_user(token)
+    
+    if not token_data:
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido o expirado"
+        )
+    
+    if not token_data.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Se requieren privilegios de administrador para acceder a las métricas"
+        )
+    
+    return {
+        "password_hashing": hashing_executor.stats(),
+        "token_cache": token_cache.stats(),
+        "revocation": revocation_list.stats(),
+        "db_pool": pool_metrics.stats(async_engine.pool),
+        "replicas": replica_set.stats(),
+    }
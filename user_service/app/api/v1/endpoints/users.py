@@ -1,15 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
+from app.api.conditional import (
+    ETAG_HEADER,
+    collection_etag,
+    none_match,
+    not_modified,
+    parse_if_match,
+    user_etag,
+)
+from app.api.fields import USER_FIELDS, fields_response, parse_fields
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    TOTAL_COUNT_MODE_HEADER,
+    CountMode,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+    split_page,
+)
 from app.crud import crud_user, crud_audit
-from app.schemas import UserCreate, UserUpdate, User
+from app.crud.user import search_terms
+from app.schemas import UserCreate, UserUpdate, User, UserBatchGetRequest, UserBatchGetResponse, UserImportResult
 from app.core.security import validate_password
 from app.core.auth import get_current_user
-from typing import List, Optional
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.user_export import MEDIA_TYPES as EXPORT_MEDIA_TYPES, export_users as run_export
+from app.core.user_import import import_users as run_import
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
+import asyncio
 import uuid
 
 router = APIRouter()
 
+# Content-Type aceptados por POST /users/import
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+}
+
 async def verify_token(authorization: Optional[str] = Header(None)) -> dict:
     """
     Verify JWT token and return token data.
@@ -32,10 +67,27 @@ async def verify_token(authorization: Optional[str] = Header(None)) -> dict:
     
     return token_data
 
+async def raise_not_found_or_changed(
+    db: AsyncSession, user_id: uuid.UUID, expected: Optional[List[datetime]]
+) -> None:
+    """
+    Explain why a write matched no user: 404 if it does not exist, 412 if it
+    exists but with a version other than the ones in `If-Match`.
+    """
+    if expected and await crud_user.get(db, id=user_id):
+        raise HTTPException(
+            status_code=412,
+            detail="El usuario cambió desde que se leyó: If-Match no coincide con su versión actual",
+        )
+    raise HTTPException(
+        status_code=404,
+        detail="The user with this id does not exist in the system",
+    )
+
 @router.post("/", response_model=User)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_in: UserCreate,
 ):
     """
@@ -46,80 +98,304 @@ def create_user(
             status_code=400,
             detail="Password must be at least 8 characters long and contain at least one uppercase letter, one lowercase letter, one number, and one special character.",
         )
-    user = crud_user.get_user_by_email(db, email=user_in.email)
-    if user:
+    try:
+        user = await crud_user.create(db, obj_in=user_in)
+    except IntegrityError:
+        # El índice único parcial ix_users_email rechaza el email duplicado
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = crud_user.create(db, obj_in=user_in)
     return user
 
+@router.post("/import", response_model=UserImportResult)
+async def import_users(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    authorization: Optional[str] = Header(None),
+    content_type: Optional[str] = Header(None),
+):
+    """
+    Bulk-import users from a streamed CSV or NDJSON body. Requires admin privileges.
+
+    Rows are validated with the same rules as user creation; invalid rows and
+    emails that are already registered are reported per row instead of failing
+    the whole import.
+    """
+    token_data = await verify_token(authorization)
+    
+    if not token_data.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Se requieren privilegios de administrador para importar usuarios"
+        )
+    
+    fmt = IMPORT_CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Content-Type must be text/csv or application/x-ndjson",
+        )
+    
+    return await run_import(
+        db, request.stream(), fmt=fmt, performed_by=uuid.UUID(token_data.sub)
+    )
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    *,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Export every user as NDJSON or CSV. Requires admin privileges.
+
+    Users are read with a server-side cursor and streamed batch by batch, so
+    memory use does not grow with the directory and the first rows are sent
+    right away.
+    """
+    token_data = await verify_token(authorization)
+    
+    if not token_data.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Se requieren privilegios de administrador para exportar usuarios"
+        )
+    
+    return StreamingResponse(
+        run_export(format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
 @router.get("/", response_model=List[User])
 async def read_users(
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    fields: Optional[str] = None,
     full_name: str = None,
     email: str = None,
     is_active: bool = None,
     authorization: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
-    Retrieve users. Requires authentication.
+    Retrieve users ordered by creation date. Requires authentication.
+
+    When more users are available, the `X-Next-Cursor` response header holds
+    an opaque cursor; pass it back as `cursor` to get the next page. Unlike
+    `skip`, a cursor costs the same on any page.
+
+    With `count`, the `X-Total-Count` header holds the number of users that
+    match the filters and `X-Total-Count-Mode` how it was obtained: `exact`
+    counts every row, `capped` stops at `USERS_COUNT_CAP` and `estimated`
+    uses the database statistics for large results. The count runs
+    concurrently with the page query.
+
+    With `fields` (for example `fields=id,email`) only those columns are read
+    and returned.
+
+    The `ETag` response header changes whenever any user is created, updated
+    or deleted; send it back in `If-None-Match` to get a `304 Not Modified`
+    without a body while the listing is unchanged. Right after a write (for
+    `USERS_ETAG_SETTLE_SECONDS`) the listing has no `ETag`.
     """
     await verify_token(authorization)
     
-    users = crud_user.get_multi(
+    selected = parse_fields(fields)
+    # La versión se lee antes que la página: si un usuario cambia entre ambas
+    # lecturas, el ETag queda viejo y la próxima petición se responde completa
+    version = await crud_user.get_version(db, settle=settings.USERS_ETAG_SETTLE_SECONDS)
+    if version is not None:
+        etag = collection_etag(version, request)
+        if none_match(if_none_match, etag):
+            return not_modified(etag)
+        response.headers[ETAG_HEADER] = etag
+    
+    # La clave del cursor (created_at, id) se lee aunque no se haya pedido
+    columns = selected and tuple(
+        field for field in USER_FIELDS if field in selected or field in ("created_at", "id")
+    )
+    
+    after = None
+    if cursor:
+        created_at, user_id = decode_cursor(cursor, 2)
+        try:
+            after = (datetime.fromisoformat(created_at), uuid.UUID(user_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    
+    page = crud_user.get_multi(
         db,
         skip=skip,
-        limit=limit,
+        limit=page_size(limit),
         full_name=full_name,
         email=email,
         is_active=is_active,
+        after=after,
+        columns=columns,
     )
+    if count:
+        users, (total, total_mode) = await asyncio.gather(
+            page, count_users(count, full_name=full_name, email=email, is_active=is_active)
+        )
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+        response.headers[TOTAL_COUNT_MODE_HEADER] = total_mode
+    else:
+        users = await page
+    users, has_next = split_page(users, limit)
+    if has_next:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([users[-1].created_at, users[-1].id])
+    if selected:
+        return fields_response(users, selected, response.headers)
     return users
 
+async def count_users(mode: str, **filters) -> Tuple[int, str]:
+    """
+    Count the users of a listing in its own session.
+
+    A session runs one query at a time, so the count needs its own
+    connection to run alongside the page query.
+    """
+    async with AsyncSessionLocal() as db:
+        return await crud_user.count(db, mode=mode, cap=settings.USERS_COUNT_CAP, **filters)
+
+@router.get("/search", response_model=List[User])
+async def search_users(
+    q: str,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Full-text search over user name and email, best matches first. Requires authentication.
+
+    Every word in `q` must match the beginning of a word in the name or the
+    email ("juan sot" finds "Juan Soto"). Results are paged like `GET /users/`:
+    pass the `X-Next-Cursor` response header back as `cursor`.
+    """
+    await verify_token(authorization)
+    
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="La búsqueda debe incluir al menos una palabra")
+    if len(terms) > settings.USERS_SEARCH_MAX_TERMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La búsqueda no puede superar {settings.USERS_SEARCH_MAX_TERMS} palabras"
+        )
+    
+    after = None
+    if cursor:
+        rank, user_id = decode_cursor(cursor, 2)
+        try:
+            after = (float(rank), uuid.UUID(user_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    
+    results = await crud_user.search(db, terms=terms, limit=page_size(limit), after=after)
+    results, has_next = split_page(results, limit)
+    if has_next:
+        user, rank = results[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([rank, user.id])
+    return [user for user, _ in results]
+
+@router.post("/batch-get", response_model=UserBatchGetResponse)
+async def batch_get_users(
+    batch_in: UserBatchGetRequest,
+    db: AsyncSession = Depends(deps.get_db),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Get several users by ID with a single query. Requires authentication.
+
+    Users are returned in request order (repeated IDs once); IDs that do not
+    exist or belong to deleted users are listed in `missing`.
+    """
+    await verify_token(authorization)
+    
+    if len(batch_in.ids) > settings.USERS_BATCH_GET_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote no puede superar {settings.USERS_BATCH_GET_MAX} IDs"
+        )
+    
+    ids = list(dict.fromkeys(batch_in.ids))
+    found = {user.id: user for user in await crud_user.get_many(db, ids)}
+    return UserBatchGetResponse(
+        users=[found[user_id] for user_id in ids if user_id in found],
+        missing=[user_id for user_id in ids if user_id not in found],
+    )
+
 @router.get("/{user_id}", response_model=User)
 async def read_user_by_id(
     user_id: uuid.UUID,
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
+    fields: Optional[str] = None,
     authorization: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Get a specific user by id. Requires authentication.
+
+    With `fields` (for example `fields=id,email`) only those columns are read
+    and returned.
+
+    The `ETag` response header identifies this version of the user; send it
+    back in `If-None-Match` to get a `304 Not Modified` without a body while
+    the user is unchanged, or in `If-Match` to update or delete the user only
+    if nobody else changed it first.
     """
     await verify_token(authorization)
     
-    user = crud_user.get(db, id=user_id)
+    selected = parse_fields(fields)
+    if selected:
+        # updated_at se lee aunque no se haya pedido: de ella sale el ETag
+        user = await crud_user.get_columns(db, user_id, selected + ("updated_at",))
+    else:
+        user = await crud_user.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
+    etag = user_etag(user.updated_at, selected)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    response.headers[ETAG_HEADER] = etag
+    if selected:
+        return fields_response(user, selected, response.headers)
     return user
 
 @router.put("/{user_id}", response_model=User)
 async def update_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
     user_id: uuid.UUID,
     user_in: UserUpdate,
     authorization: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None),
 ):
     """
     Update a user. Requires authentication.
+
+    With `If-Match`, the update only applies if the user still has that
+    `ETag`; otherwise the response is `412 Precondition Failed`.
     """
     token_data = await verify_token(authorization)
     
     # Solo permitir que los usuarios actualicen sus propios datos o que los admins actualicen cualquier usuario
-    user = crud_user.get(db, id=user_id)
-    if not user:
-        raise HTTPException(
-            status_code=404,
-            detail="The user with this id does not exist in the system",
-        )
-    
     if not token_data.is_admin and str(user_id) != token_data.sub:
         raise HTTPException(
             status_code=403,
@@ -132,18 +408,28 @@ async def update_user(
             detail="Password must be at least 8 characters long and contain at least one uppercase letter, one lowercase letter, one number, and one special character.",
         )
     
-    user = crud_user.update(db, db_obj=user, obj_in=user_in)
+    # Un solo UPDATE ... RETURNING: no se lee el usuario antes de actualizarlo.
+    # La versión de If-Match se comprueba en el mismo WHERE
+    expected = parse_if_match(if_match)
+    user = await crud_user.update_by_id(db, id=user_id, obj_in=user_in, updated_at=expected)
+    if not user:
+        await raise_not_found_or_changed(db, user_id, expected)
+    response.headers[ETAG_HEADER] = user_etag(user.updated_at)
     return user
 
 @router.delete("/{user_id}", response_model=User)
 async def delete_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_id: uuid.UUID,
     authorization: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None),
 ):
     """
     Delete a user. Requires admin privileges.
+
+    With `If-Match`, the user is only deleted if it still has that `ETag`;
+    otherwise the response is `412 Precondition Failed`.
     """
     token_data = await verify_token(authorization)
     
@@ -153,35 +439,37 @@ async def delete_user(
             detail="Se requieren privilegios de administrador para eliminar usuarios"
         )
     
-    user = crud_user.get(db, id=user_id)
+    # La eliminación y su registro de auditoría se confirman en una sola transacción
+    expected = parse_if_match(if_match)
+    user = await crud_user.remove(db, id=user_id, commit=False, updated_at=expected)
     if not user:
-        raise HTTPException(
-            status_code=404,
-            detail="The user with this id does not exist in the system",
-        )
+        await db.rollback()
+        await raise_not_found_or_changed(db, user_id, expected)
         
-    # Prevenir que se elimine al último administrador
+    # Prevenir que se elimine al último administrador (el usuario ya está marcado como eliminado).
+    # El lock hace que dos eliminaciones simultáneas de administradores se vean entre sí.
     if user.is_admin:
-        admin_count = len([u for u in crud_user.get_multi(db) if u.is_admin and u.id != user_id])
-        if admin_count == 0:
+        await crud_user.lock_admins(db)
+        if await crud_user.count_active_admins(db, limit=1) == 0:
+            await db.rollback()
             raise HTTPException(
                 status_code=400,
                 detail="No se puede eliminar al último usuario administrador"
             )
     
-    user = crud_user.remove(db, id=user_id)
-    
     # Log the user deletion in audit logs
-    crud_audit.create_log(
+    await crud_audit.create_log(
         db,
         action="delete_user",
         entity_type="user",
         entity_id=user_id,
-        performed_by=token_data.sub,
+        performed_by=uuid.UUID(token_data.sub),
         details={
             "deleted_user_email": user.email,
             "soft_delete": True
-        }
+        },
+        commit=False
     )
+    await db.commit()
     
     return user
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+from typing import Any, Dict
+from app.core.config import settings
+from app.core.keys import key_ring
+
+router = APIRouter()
+
+@router.get("/jwks.json")
+def get_jwks(response: Response) -> Dict[str, Any]:
+    """
+    Public signing keys (JWK Set) so other services can verify tokens locally.
+    """
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_CACHE_MAX_AGE}"
+    return key_ring.jwks()
@@ -1,22 +1,32 @@
 """
 Módulo de autenticación y manejo de JWT.
 Implementa la creación, validación y decodificación de tokens JWT.
+
+Los tokens se firman con la clave activa de `app.core.keys.key_ring` (RS256
+por defecto, con el `kid` en el header) o, si JWT_ALGORITHM es HS256, con el
+SECRET_KEY compartido.
 """
 
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Any, Dict, Optional, Union
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.core.keys import key_ring
+from app.core.revocation import revocation_list
+from app.core.security import pwd_context, verify_password, get_password_hash  # reexportados por compatibilidad
+
 # Configuración de JWT
-SECRET_KEY = "your-secret-key-keep-it-secret"  # En producción, usar variable de entorno
-ALGORITHM = "HS256"
+SECRET_KEY = settings.SECRET_KEY  # Solo se usa con algoritmos HMAC (HS256)
+ALGORITHM = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Configuración de hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class Token(BaseModel):
     """Schema para el token de acceso."""
     access_token: str
@@ -27,6 +37,72 @@ class TokenPayload(BaseModel):
     sub: str  # ID del usuario
     exp: int  # Timestamp de expiración
     is_admin: bool  # Flag de administrador
+    jti: Optional[str] = None  # ID del token, usado para revocarlo
+
+class TokenCache:
+    """
+    Cache LRU de payloads de tokens ya verificados.
+
+    Las claves son el digest SHA-256 del token (nunca se guarda el token en sí)
+    y cada entrada expira en el `exp` del token, por lo que un cliente que
+    repite el mismo token solo paga la verificación HMAC una vez.
+
+    Attributes:
+        maxsize: Número máximo de tokens en cache
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, TokenPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[TokenPayload]:
+        """Retorna el payload cacheado del token o None si no está o expiró."""
+        key = self._key(token)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None or payload.exp <= time.time():
+                if payload is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: TokenPayload) -> None:
+        """Guarda el payload de un token verificado, desalojando el menos usado."""
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vacía la cache (por ejemplo, tras rotar la clave de firma)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna el tamaño de la cache y sus contadores de aciertos/fallos."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
 
 def create_access_token(
     subject: Union[str, Any],
@@ -52,23 +128,30 @@ def create_access_token(
     to_encode = {
         "sub": str(subject),
         "exp": expire,
-        "is_admin": is_admin
+        "is_admin": is_admin,
+        "jti": uuid.uuid4().hex
     }
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    if key_ring.is_asymmetric:
+        signing_key = key_ring.signing_key
+        encoded_jwt = jwt.encode(
+            to_encode,
+            signing_key.private_key,
+            algorithm=ALGORITHM,
+            headers={"kid": signing_key.kid}
+        )
+    else:
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica si una contraseña coincide con su hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Genera un hash bcrypt de una contraseña."""
-    return pwd_context.hash(password)
-
 async def get_current_user(token: str) -> Optional[TokenPayload]:
     """
     Valida un token JWT y retorna la información del usuario.
     
+    Los tokens válidos se guardan en `token_cache`, de modo que las
+    peticiones siguientes con el mismo token no vuelven a verificar la firma.
+    La revocación se comprueba siempre, contra la réplica en memoria de
+    `revocation_list`.
+    
     Args:
         token: Token JWT a validar
         
@@ -78,17 +161,37 @@ async def get_current_user(token: str) -> Optional[TokenPayload]:
     Raises:
         JWTError: Si el token es inválido o ha expirado
     """
+    token_data = token_cache.get(token)
+    if token_data is None:
+        token_data = _decode_token(token)
+        if token_data is None:
+            return None
+        token_cache.put(token, token_data)
+    
+    if token_data.jti and await revocation_list.is_revoked(token_data.jti):
+        return None
+    return token_data
+
+def _decode_token(token: str) -> Optional[TokenPayload]:
+    """Verifica la firma y la expiración de un token y retorna su contenido."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if key_ring.is_asymmetric:
+            key = key_ring.verification_key(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                return None
+        else:
+            key = SECRET_KEY
+        payload = jwt.decode(token, key, algorithms=[ALGORITHM])
         token_data = TokenPayload(
             sub=payload["sub"],
             exp=payload["exp"],
-            is_admin=payload["is_admin"]
+            is_admin=payload["is_admin"],
+            jti=payload.get("jti")
         )
         
         if datetime.fromtimestamp(token_data.exp) < datetime.utcnow():
             return None
-            
+        
         return token_data
     except JWTError:
         return None
@@ -1,13 +1,99 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "User Service"
     API_V1_STR: str = "/api/v1"
     DATABASE_URL: str
+    # Por defecto se deriva de DATABASE_URL con el driver asyncpg
+    ASYNC_DATABASE_URL: Optional[str] = None
     SECRET_KEY: str
 
+    # Pool de conexiones por worker (conexiones máximas = workers * (size + overflow))
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Segundos antes de reemplazar una conexión (-1 = nunca)
+    DB_POOL_RECYCLE: int = 1800
+    # Valida cada conexión al entregarla (un round-trip extra por checkout)
+    DB_POOL_PRE_PING: bool = False
+    # Desactiva los prepared statements con nombre de asyncpg (PgBouncer en modo transacción)
+    DB_PGBOUNCER: bool = False
+    # Prepared statements de asyncpg guardados por conexión
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
+    # Réplicas de lectura (vacío = todo al primario) y retraso máximo tolerado
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: int = 5
+
+    # Política de hashing: el primer esquema es el vigente, el resto se migra al iniciar sesión.
+    # Los costos se ajustan con `python -m app.scripts.calibrate_hashing`.
+    PASSWORD_SCHEMES: List[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # Hashing de contraseñas (None = un proceso por CPU)
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    # Admisión de hashing (None = tantas operaciones en curso como procesos)
+    HASH_MAX_CONCURRENCY: Optional[int] = None
+    HASH_MAX_QUEUE: int = 64
+    HASH_MAX_WAIT_SECONDS: float = 2.0
+
+    # Firma de tokens JWT: RS256 publica sus claves en /.well-known/jwks.json
+    JWT_ALGORITHM: str = "RS256"
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_ACTIVE_KID: Optional[str] = None
+    JWKS_CACHE_MAX_AGE: int = 3600
+
+    # Refresh tokens opacos y barrido de sesiones expiradas
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 3600
+
+    # Revocación de tokens: réplica en memoria (filtro de Bloom) refrescada cada N segundos
+    REVOCATION_REFRESH_SECONDS: int = 5
+    # Margen al releer revocaciones: debe superar la duración máxima de la transacción
+    # que revoca (revoked_at es su hora de inicio); nunca menor a dos refrescos
+    REVOCATION_REFRESH_OVERLAP_SECONDS: int = 60
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # Importación masiva: contraseñas por tarea de hashing y tareas en paralelo
+    # (None = la mitad de HASH_MAX_CONCURRENCY, para no desplazar a los logins)
+    IMPORT_HASH_BATCH_SIZE: int = 16
+    IMPORT_HASH_CONCURRENCY: Optional[int] = None
+    # Espera máxima de la importación sin poder hashear (pool saturado); después las
+    # filas rechazadas se reportan como fallidas
+    IMPORT_HASH_MAX_WAIT_SECONDS: float = 30.0
+
+    # Tamaño máximo de un lote en POST /auth/introspect
+    INTROSPECT_MAX_BATCH: int = 1000
+
+    # Tamaño máximo de un lote en POST /users/batch-get
+    USERS_BATCH_GET_MAX: int = 1000
+
+    # Palabras máximas por consulta en GET /users/search
+    USERS_SEARCH_MAX_TERMS: int = 8
+
+    # Filas por lote del cursor de GET /users/export
+    USERS_EXPORT_BATCH_SIZE: int = 1000
+
+    # Tope del conteo de GET /users/?count=capped y umbral bajo el cual
+    # count=estimated cuenta en lugar de estimar
+    USERS_COUNT_CAP: int = 10000
+
+    # Antigüedad mínima (segundos) de la última modificación para dar ETag al
+    # listado de usuarios: mayor que la transacción de escritura más larga
+    USERS_ETAG_SETTLE_SECONDS: float = 5.0
+
+    # Cache de tokens JWT verificados (0 = deshabilitada)
+    TOKEN_CACHE_SIZE: int = 10000
+
     class Config:
         env_file = ".env"
 
 settings = Settings()
-    
\ No newline at end of file
+
@@ -1,9 +1,205 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.pool import PoolMetrics, instrumented_pool_class
+
+logger = logging.getLogger(__name__)
+
+# bind_arguments con que las lecturas del CRUD piden ir a una réplica
+REPLICA_READ = {"replica": True}
+
+# Retraso de una réplica en segundos (0 si está al día o no es una réplica)
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+def async_database_url(url: str) -> str:
+    """Convierte una URL de PostgreSQL síncrona en su equivalente con el driver asyncpg."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+def pool_options() -> Dict[str, Any]:
+    """Parámetros del pool de conexiones tomados de la configuración."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def asyncpg_connect_args(url: str) -> Dict[str, Any]:
+    """
+    Argumentos de conexión de asyncpg.
+
+    asyncpg ejecuta cada consulta como prepared statement y guarda hasta
+    DB_PREPARED_STATEMENT_CACHE_SIZE por conexión, así las consultas repetidas
+    no se vuelven a planificar en el servidor. Detrás de PgBouncer en modo
+    transacción cada transacción puede ir a una conexión de servidor distinta,
+    por lo que esas caches se desactivan y se usan nombres únicos.
+    """
+    if make_url(url).get_driver_name() != "asyncpg":
+        return {}
+    if not settings.DB_PGBOUNCER:
+        return {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
 
-engine = create_engine(settings.DATABASE_URL)
+# Engine síncrono: solo para DDL (create_all) y scripts de mantenimiento
+engine = create_engine(settings.DATABASE_URL, **pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine asíncrono: usado por la API, no bloquea el event loop durante las queries
+pool_metrics = PoolMetrics()
+_async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url,
+    poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, pool_metrics),
+    connect_args=asyncpg_connect_args(_async_url),
+    **pool_options()
+)
+
+
+class Replica:
+    """
+    Réplica de lectura y su último estado conocido.
+
+    Attributes:
+        engine: Engine asíncrono de la réplica
+        pool_metrics: Métricas del pool de conexiones de la réplica
+        healthy: Si puede recibir lecturas
+        lag: Último retraso de replicación medido, en segundos
+        reads: Lecturas enviadas a la réplica
+    """
+
+    def __init__(self, url: str):
+        # Cada réplica tiene su propio pool, medido igual que el del primario
+        self.pool_metrics = PoolMetrics()
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, self.pool_metrics),
+            connect_args=asyncpg_connect_args(url),
+            **pool_options()
+        )
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.reads = 0
+
+
+class ReplicaSet:
+    """
+    Réplicas de lectura con selección round-robin.
+
+    Una réplica sale de la rotación cuando falla una conexión o cuando su
+    retraso supera REPLICA_MAX_LAG_SECONDS, y vuelve en la siguiente
+    verificación exitosa. Sin réplicas disponibles, las lecturas van al primario.
+    """
+
+    def __init__(self, urls: List[str], max_lag: float):
+        self.max_lag = max_lag
+        self.replicas = [Replica(async_database_url(url)) for url in urls]
+        self._cycle = itertools.cycle(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Retorna la siguiente réplica sana, o None si no hay ninguna."""
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+        return None
+
+    def mark_failed(self, replica: Replica) -> None:
+        """Saca una réplica de la rotación hasta la próxima verificación."""
+        if replica.healthy:
+            logger.warning("Réplica %s fuera de rotación por un error de conexión", replica.engine.url)
+        replica.healthy = False
+
+    async def check(self) -> None:
+        """Mide el retraso de cada réplica y actualiza su estado."""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    replica.lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar())
+            except Exception:
+                logger.warning("No se pudo verificar la réplica %s", replica.engine.url)
+                replica.healthy = False
+                continue
+            replica.healthy = replica.lag <= self.max_lag
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Retorna el estado de cada réplica."""
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag,
+                "reads": replica.reads,
+                "db_pool": replica.pool_metrics.stats(replica.engine.pool),
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_set = ReplicaSet(settings.DATABASE_REPLICA_URLS, settings.REPLICA_MAX_LAG_SECONDS)
+
+
+class RoutingSession(Session):
+    """
+    Sesión que envía las lecturas marcadas con REPLICA_READ a una réplica.
+
+    Todo lo demás (flush, INSERT/UPDATE/DELETE, lecturas sin marcar) va al
+    primario. Después de la primera escritura la sesión queda fijada al
+    primario, de modo que una petición siempre lee sus propias escrituras.
+    Mientras siga sana, la sesión usa la misma réplica en todas sus lecturas:
+    una versión leída al inicio (ETag) nunca es más nueva que los datos que
+    se leen después.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw) -> Engine:
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["primary"] = True
+        elif replica and not self.info.get("primary"):
+            pinned = self.info.get("pinned_replica")
+            chosen = pinned if pinned is not None and pinned.healthy else replica_set.choose()
+            self.info["pinned_replica"] = chosen
+            if chosen is not None:
+                self.info["replica"] = chosen
+                return chosen.engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def use_primary(db: AsyncSession) -> None:
+    """Fija la sesión al primario (lecturas que preceden a una escritura)."""
+    db.info["primary"] = True
+
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
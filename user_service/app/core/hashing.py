@@ -0,0 +1,236 @@
+"""
+Ejecutor dedicado para el hashing de contraseñas.
+
+bcrypt es costoso en CPU a propósito, por lo que verificar o generar un hash
+directamente dentro de un endpoint `async def` bloquea el event loop de uvicorn
+durante todo el cálculo. Este módulo envía esas operaciones a un pool de procesos
+configurable, permite esperarlas de forma asíncrona y mantiene métricas de la
+cola y de la latencia.
+
+Las operaciones asíncronas pasan además por un control de admisión: como máximo
+HASH_MAX_CONCURRENCY operaciones en curso, HASH_MAX_QUEUE esperando y ninguna
+espera más de HASH_MAX_WAIT_SECONDS. Lo que excede esos límites se rechaza con
+`HashingOverloaded` (503 + Retry-After) en lugar de acumular CPU y latencia.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from app.core import security
+from app.core.config import settings
+
+
+class HashingOverloaded(Exception):
+    """La cola de hashing está llena o la espera superó el máximo permitido."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Cola de hashing saturada, reintentar en {retry_after}s")
+        self.retry_after = retry_after
+
+
+class HashingExecutor:
+    """
+    Pool de procesos para operaciones de hashing de contraseñas.
+
+    Cada worker de uvicorn crea su propio pool al iniciar (`start`, desde el
+    lifespan); los scripts lo crean en el primer uso, así los que no hashean
+    no lo inician. Los procesos del pool parten de un forkserver y no con
+    `fork`: el worker ya tiene hilos (el del pool, los de aiosqlite y
+    `to_thread`) y un fork en ese estado puede quedar bloqueado.
+
+    Attributes:
+        max_workers: Número de procesos del pool
+        max_concurrency: Operaciones async admitidas en paralelo
+        max_queue: Operaciones async que pueden esperar turno
+        max_wait: Segundos máximos de espera por un turno
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        max_queue: int = 64,
+        max_wait: float = 2.0
+    ):
+        """
+        Inicializa el ejecutor.
+
+        Args:
+            max_workers: Procesos del pool (por defecto, el número de CPUs)
+            max_concurrency: Límite de operaciones en curso (por defecto, max_workers)
+            max_queue: Límite de operaciones esperando turno
+            max_wait: Espera máxima por un turno, en segundos
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.max_workers
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        # El semáforo se crea dentro del event loop en el primer uso
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._shed = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # forkserver no existe en Windows; ahí se usa spawn
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context(method)
+                )
+            return self._pool
+
+    def start(self) -> None:
+        """Crea el pool de procesos si aún no existe."""
+        self._get_pool()
+
+    def _record(self, started_at: float, future: Future) -> None:
+        latency = time.perf_counter() - started_at
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+                return
+            self._completed += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Envía una operación al pool.
+
+        Args:
+            fn: Función a nivel de módulo (debe poder serializarse con pickle)
+            *args: Argumentos de la función
+
+        Returns:
+            Future con el resultado de la operación
+        """
+        pool = self._get_pool()
+        started_at = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = pool.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(lambda f: self._record(started_at, f))
+        return future
+
+    def _retry_after(self) -> int:
+        with self._lock:
+            avg_latency = self._total_latency / self._completed if self._completed else 0.0
+        backlog = (self._waiting + self.max_concurrency) / self.max_concurrency
+        return max(1, math.ceil(avg_latency * backlog))
+
+    def _reject(self) -> HashingOverloaded:
+        self._shed += 1
+        return HashingOverloaded(self._retry_after())
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Reserva un turno de hashing respetando los límites de admisión.
+
+        Raises:
+            HashingOverloaded: Si la cola está llena o se agota la espera
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise self._reject()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise self._reject()
+        finally:
+            self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta una operación en el pool y espera su resultado sin bloquear el event loop.
+
+        Raises:
+            HashingOverloaded: Si la operación no es admitida
+        """
+        async with self.admit():
+            return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del ejecutor.
+
+        Returns:
+            Diccionario con la profundidad de las colas (admisión y pool),
+            las operaciones rechazadas y la latencia (en ms) de las completadas
+        """
+        with self._lock:
+            avg_latency = self._total_latency / self._completed if self._completed else 0.0
+            return {
+                "workers": self.max_workers,
+                "max_concurrency": self.max_concurrency,
+                "admission_waiting": self._waiting,
+                "shed": self._shed,
+                "queue_depth": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_latency_ms": round(avg_latency * 1000, 3),
+                "max_latency_ms": round(self._max_latency * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        """Detiene el pool de procesos si fue iniciado."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+hashing_executor = HashingExecutor(
+    settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.HASH_MAX_CONCURRENCY,
+    max_queue=settings.HASH_MAX_QUEUE,
+    max_wait=settings.HASH_MAX_WAIT_SECONDS,
+)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica una contraseña contra su hash en el pool de hashing."""
+    return await hashing_executor.run(security.verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica una contraseña en el pool y, si su hash quedó obsoleto, retorna uno nuevo.
+
+    La verificación y el rehash ocurren en la misma tarea del pool, por lo que
+    migrar un hash no agrega otro viaje a la cola de admisión.
+    """
+    return await hashing_executor.run(security.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    """Genera el hash de una contraseña en el pool de hashing."""
+    return await hashing_executor.run(security.get_password_hash, password)
@@ -0,0 +1,139 @@
+"""
+Manejo de las claves de firma de los tokens JWT.
+
+Con un algoritmo asimétrico (RS256) el servicio firma con una clave privada y
+publica las claves públicas en `/.well-known/jwks.json`, de modo que otros
+servicios pueden verificar los tokens localmente sin compartir el secreto ni
+consultar a este servicio.
+
+Rotación de claves:
+    Las claves privadas se leen (en formato PEM) desde JWT_KEYS_DIR. Todas se
+    publican en el JWKS y sirven para verificar, pero solo la clave activa
+    (JWT_ACTIVE_KID, o la última en orden alfabético) firma tokens nuevos.
+    Sin claves en el directorio el servicio no inicia. Para rotar, se agrega
+    la clave nueva al directorio (`python -m app.scripts.generate_jwt_key`),
+    se espera a que los servicios refresquen el JWKS y luego se activa; la
+    clave anterior se elimina cuando ya no quedan tokens vigentes firmados
+    con ella.
+"""
+
+import base64
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+from jose.backends.base import Key
+
+from app.core.config import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512")
+
+
+def _b64url_uint(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+class SigningKey:
+    """
+    Par de claves RSA identificado por su `kid`.
+
+    El `kid` es el thumbprint RFC 7638 de la clave pública, por lo que es
+    estable entre reinicios y entre workers que comparten el mismo archivo.
+    """
+
+    def __init__(self, private_key: rsa.RSAPrivateKey, algorithm: str):
+        numbers = private_key.public_key().public_numbers()
+        self.algorithm = algorithm
+        self.public_jwk: Dict[str, Any] = {
+            "kty": "RSA",
+            "n": _b64url_uint(numbers.n),
+            "e": _b64url_uint(numbers.e),
+        }
+        thumbprint = json.dumps(
+            {k: self.public_jwk[k] for k in ("e", "kty", "n")},
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+        self.kid = base64.urlsafe_b64encode(
+            hashlib.sha256(thumbprint.encode()).digest()
+        ).rstrip(b"=").decode()
+        self.public_jwk.update({"kid": self.kid, "use": "sig", "alg": algorithm})
+
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        # Las claves se construyen una sola vez para no parsear el PEM en cada token
+        self.private_key: Key = jwk.construct(private_pem, algorithm)
+        self.public_key: Key = jwk.construct(public_pem, algorithm)
+
+
+class KeyRing:
+    """
+    Conjunto de claves de firma del servicio.
+
+    Attributes:
+        algorithm: Algoritmo JWT configurado
+        keys: Claves disponibles indexadas por kid
+        active_kid: kid de la clave que firma los tokens nuevos
+    """
+
+    def __init__(self, algorithm: str, keys_dir: Optional[str] = None, active_kid: Optional[str] = None):
+        self.algorithm = algorithm
+        self.keys: Dict[str, SigningKey] = {}
+        self.active_kid: Optional[str] = None
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            return
+
+        loaded: List[SigningKey] = []
+        if keys_dir:
+            for filename in sorted(os.listdir(keys_dir)):
+                if not filename.endswith(".pem"):
+                    continue
+                with open(os.path.join(keys_dir, filename), "rb") as f:
+                    private_key = serialization.load_pem_private_key(f.read(), password=None)
+                loaded.append(SigningKey(private_key, algorithm))
+        if not loaded:
+            # Una clave generada al iniciar sería distinta en cada worker y réplica, y
+            # los tokens dejarían de validar al reiniciar: sin claves no se inicia
+            raise RuntimeError(
+                f"{algorithm} requiere claves PEM en JWT_KEYS_DIR ({keys_dir or 'no definido'}); "
+                "generar una con `python -m app.scripts.generate_jwt_key --dir <directorio>` "
+                "o usar JWT_ALGORITHM=HS256 con SECRET_KEY"
+            )
+
+        self.keys = {key.kid: key for key in loaded}
+        if active_kid and active_kid not in self.keys:
+            raise ValueError(f"JWT_ACTIVE_KID {active_kid} no corresponde a ninguna clave cargada")
+        self.active_kid = active_kid or loaded[-1].kid
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    @property
+    def signing_key(self) -> SigningKey:
+        """Clave activa para firmar tokens nuevos."""
+        return self.keys[self.active_kid]
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Key]:
+        """Retorna la clave pública asociada a un kid, o None si no se conoce."""
+        key = self.keys.get(kid) if kid else None
+        return key.public_key if key else None
+
+    def jwks(self) -> Dict[str, Any]:
+        """Retorna el JWK Set público con todas las claves de verificación."""
+        return {"keys": [key.public_jwk for key in self.keys.values()]}
+
+
+key_ring = KeyRing(settings.JWT_ALGORITHM, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
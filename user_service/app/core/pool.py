@@ -0,0 +1,100 @@
+"""
+Pool de conexiones instrumentado.
+
+Cada worker de uvicorn tiene su propio pool, por lo que el número máximo de
+conexiones hacia la base de datos es `workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`.
+Para dimensionarlo sin adivinar, el pool registra cuántas conexiones están en
+uso, cuánto se espera por una conexión y cuántas esperas terminan en
+`QueuePool limit ... reached` (timeout) o en un error al conectar.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import PoolProxiedConnection, QueuePool
+
+
+class PoolMetrics:
+    """
+    Contadores de checkout de un pool de conexiones.
+
+    Attributes:
+        checkouts: Conexiones entregadas
+        timeouts: Esperas que superaron DB_POOL_TIMEOUT
+        connect_failures: Errores al abrir o validar una conexión
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connect_failures = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.connect_failures += 1
+
+    def stats(self, pool: QueuePool) -> Dict[str, Any]:
+        """
+        Retorna el estado actual del pool junto con los contadores acumulados.
+
+        Args:
+            pool: Pool del engine (cambia de instancia tras un dispose)
+
+        Returns:
+            Diccionario con las conexiones en uso, ociosas y de overflow, y la
+            espera (en ms) por una conexión
+        """
+        with self._lock:
+            avg_wait = self._total_wait / self.checkouts if self.checkouts else 0.0
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # overflow() es negativo mientras el pool no alcanza su tamaño
+                "overflow": max(pool.overflow(), 0),
+                "timeout_seconds": pool.timeout(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connect_failures": self.connect_failures,
+                "avg_wait_ms": round(avg_wait * 1000, 3),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+
+def instrumented_pool_class(base: Type[QueuePool], metrics: PoolMetrics) -> Type[QueuePool]:
+    """
+    Crea una subclase de `base` que registra sus checkouts en `metrics`.
+
+    Las métricas quedan en la clase y no en la instancia porque SQLAlchemy
+    recrea el pool (con la misma clase) cada vez que se hace dispose del engine.
+    """
+
+    def connect(self) -> PoolProxiedConnection:
+        started_at = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            metrics.record_timeout()
+            raise
+        except Exception:
+            metrics.record_failure()
+            raise
+        metrics.record_checkout(time.perf_counter() - started_at)
+        return connection
+
+    return type(f"Instrumented{base.__name__}", (base,), {"connect": connect})
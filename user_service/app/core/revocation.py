@@ -0,0 +1,173 @@
+"""
+Verificación de revocación de tokens en memoria.
+
+Consultar la base de datos en cada petición autenticada agregaría una query a
+cada request. En su lugar, cada worker mantiene una réplica de la tabla
+`revoked_tokens`, refrescada de forma incremental:
+
+- Un filtro de Bloom responde el caso común ("no revocado") con una prueba
+  de bits en memoria, sin falsos negativos.
+- Un conjunto exacto confirma los aciertos del filtro.
+- Solo los falsos positivos del filtro (aciertos que no están en el conjunto)
+  llegan a la base de datos.
+
+Una revocación hecha en otro worker se ve aquí, como máximo, tras
+REVOCATION_REFRESH_SECONDS.
+"""
+
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud.revocation import crud_revoked_token
+
+# Margen al leer revocaciones nuevas, para no perder filas confirmadas después
+# de la última lectura con un revoked_at anterior (la hora de inicio de su
+# transacción). Al menos dos refrescos, por si uno se demora
+REFRESH_OVERLAP = timedelta(seconds=max(
+    settings.REVOCATION_REFRESH_OVERLAP_SECONDS, 2 * settings.REVOCATION_REFRESH_SECONDS
+))
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un bytearray con doble hashing.
+
+    Attributes:
+        size: Número de bits del filtro
+        hash_count: Número de posiciones por elemento
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Dimensiona el filtro para `capacity` elementos con la tasa de error dada.
+
+        Args:
+            capacity: Número esperado de elementos
+            error_rate: Probabilidad de falso positivo a plena capacidad
+        """
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _hashes(self, item: str):
+        digest = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=16).digest(), "little")
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, item: str) -> None:
+        h1, h2 = self._hashes(item)
+        for i in range(self.hash_count):
+            pos = (h1 + i * h2) % self.size
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        # Sale en el primer bit en cero: un elemento ausente suele descartarse en 1-2 pruebas
+        h1, h2 = self._hashes(item)
+        bits, size = self._bits, self.size
+        for i in range(self.hash_count):
+            pos = (h1 + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """
+    Réplica en memoria de los tokens revocados de este worker.
+
+    Attributes:
+        capacity: Capacidad del filtro de Bloom antes de reconstruirlo
+        error_rate: Tasa de falsos positivos objetivo del filtro
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self.bloom_hits = 0
+        self.false_positives = 0
+        self.db_lookups = 0
+
+    def _add(self, jti: str, expires_at: datetime) -> None:
+        self._revoked[jti] = expires_at
+        self._bloom.add(jti)
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """Registra localmente una revocación (la persistencia es responsabilidad del llamador)."""
+        self._add(jti, expires_at)
+
+    async def refresh(self) -> None:
+        """
+        Incorpora las revocaciones registradas desde la última lectura (menos
+        REFRESH_OVERLAP; releer una revocación ya conocida no tiene efecto).
+
+        Cuando el conjunto supera la capacidad del filtro, se descartan las
+        entradas expiradas y se reconstruye el filtro para mantener la tasa de
+        falsos positivos.
+        """
+        since = self._watermark - REFRESH_OVERLAP if self._watermark else None
+        async with AsyncSessionLocal() as db:
+            rows, now = await crud_revoked_token.get_revoked_since(db, since=since)
+
+        for jti, expires_at in rows:
+            self._add(jti, expires_at)
+        # La marca es la hora de la base de datos, no la de este servidor: las
+        # filas se comparan con revoked_at, que asigna el mismo reloj
+        self._watermark = now
+        if len(self._revoked) > self.capacity:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        now = datetime.now(timezone.utc)
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self.capacity = max(self.capacity, len(self._revoked) * 2)
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Indica si un token está revocado.
+
+        Args:
+            jti: Identificador del token
+
+        Returns:
+            True si el token fue revocado
+        """
+        if jti not in self._bloom:
+            return False
+        self.bloom_hits += 1
+        if jti in self._revoked:
+            return True
+
+        self.db_lookups += 1
+        async with AsyncSessionLocal() as db:
+            revoked = await crud_revoked_token.is_revoked(db, jti=jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna el tamaño de la réplica y los contadores de aciertos del filtro."""
+        return {
+            "revoked": len(self._revoked),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+            "bloom_hits": self.bloom_hits,
+            "false_positives": self.false_positives,
+            "db_lookups": self.db_lookups,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+revocation_list = RevocationList(
+    settings.REVOCATION_BLOOM_CAPACITY,
+    settings.REVOCATION_BLOOM_ERROR_RATE,
+)
@@ -1,14 +1,76 @@
+"""
+Contexto compartido de hashing de contraseñas y validación de complejidad.
+
+Todo el servicio usa el mismo `pwd_context`, construido a partir de
+PASSWORD_SCHEMES y de los parámetros de costo configurados. El primer esquema
+es el vigente; los demás solo se aceptan para verificar hashes antiguos, que
+se actualizan al iniciar sesión (ver `verify_and_update`).
+"""
+
+from typing import List, Optional, Tuple
 from passlib.context import CryptContext
 import re
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+def build_crypt_context(
+    schemes: List[str],
+    *,
+    bcrypt_rounds: int = 12,
+    argon2_time_cost: int = 3,
+    argon2_memory_cost: int = 65536,
+    argon2_parallelism: int = 4
+) -> CryptContext:
+    """
+    Construye un contexto de hashing con los parámetros de costo indicados.
+
+    Args:
+        schemes: Esquemas aceptados; el primero se usa para los hashes nuevos
+        bcrypt_rounds: Log2 de las iteraciones de bcrypt
+        argon2_time_cost: Iteraciones de argon2
+        argon2_memory_cost: Memoria de argon2 en KiB
+        argon2_parallelism: Hilos de argon2
+
+    Returns:
+        CryptContext que marca como obsoletos los esquemas secundarios y los
+        hashes con parámetros distintos a los configurados
+    """
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+pwd_context = build_crypt_context(
+    settings.PASSWORD_SCHEMES,
+    bcrypt_rounds=settings.BCRYPT_ROUNDS,
+    argon2_time_cost=settings.ARGON2_TIME_COST,
+    argon2_memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2_parallelism=settings.ARGON2_PARALLELISM,
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica una contraseña y, si su hash no cumple la política vigente, genera uno nuevo.
+
+    Returns:
+        Tupla (válida, nuevo_hash); nuevo_hash es None si no requiere actualización
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Hashea un lote de contraseñas en una sola tarea (importaciones masivas)."""
+    return [pwd_context.hash(password) for password in passwords]
+
 def validate_password(password: str) -> bool:
     if len(password) < 8:
         return False
@@ -0,0 +1,74 @@
+"""
+Tareas periódicas de mantenimiento.
+
+Cada worker de uvicorn las inicia en el arranque de la aplicación y las cancela
+al apagarse. Son idempotentes, por lo que varios workers pueden ejecutarlas
+en paralelo sin coordinarse.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, replica_set
+from app.core.revocation import revocation_list
+from app.crud.revocation import crud_revoked_token
+from app.crud.session import crud_session
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(interval: float, fn: Callable[[], Awaitable[Any]]) -> None:
+    """
+    Ejecuta la corrutina `fn` cada `interval` segundos hasta ser cancelada.
+
+    Los errores se registran y no detienen la tarea.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await fn()
+        except Exception:
+            logger.exception("Error en la tarea periódica %s", fn.__name__)
+
+
+async def purge_expired_sessions() -> None:
+    """Elimina las sesiones de refresh token expiradas."""
+    async with AsyncSessionLocal() as db:
+        purged = await crud_session.purge_expired(db)
+    if purged:
+        logger.info("Sesiones expiradas eliminadas: %d", purged)
+
+
+async def purge_expired_revocations() -> None:
+    """Elimina las revocaciones de tokens que ya expiraron."""
+    async with AsyncSessionLocal() as db:
+        await crud_revoked_token.purge_expired(db)
+
+
+def start_background_tasks() -> List[asyncio.Task]:
+    """Inicia las tareas periódicas del worker y retorna sus handles."""
+    tasks = [
+        asyncio.create_task(
+            run_periodically(settings.SESSION_SWEEP_INTERVAL_SECONDS, purge_expired_sessions)
+        ),
+        asyncio.create_task(
+            run_periodically(settings.SESSION_SWEEP_INTERVAL_SECONDS, purge_expired_revocations)
+        ),
+        asyncio.create_task(
+            run_periodically(settings.REVOCATION_REFRESH_SECONDS, revocation_list.refresh)
+        ),
+    ]
+    if replica_set.replicas:
+        tasks.append(asyncio.create_task(
+            run_periodically(settings.REPLICA_CHECK_INTERVAL_SECONDS, replica_set.check)
+        ))
+    return tasks
+
+
+async def stop_background_tasks(tasks: List[asyncio.Task]) -> None:
+    """Cancela las tareas periódicas y espera a que terminen."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,80 @@
+"""
+Exportación del directorio de usuarios.
+
+Recorrer el directorio con GET /users/ carga cada página completa en memoria y
+la serializa como una lista. La exportación lee los usuarios con un cursor del
+servidor, lote a lote, y envía cada lote serializado apenas llega: la memoria
+no crece con la cantidad de usuarios y los primeros bytes salen de inmediato.
+
+Formato NDJSON: un objeto JSON por usuario y línea. Formato CSV: una cabecera
+con las columnas de EXPORT_COLUMNS y un usuario por línea.
+"""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy.engine import Row
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud import crud_user
+from app.crud.user import EXPORT_COLUMNS
+
+# Content-Type de la respuesta por formato
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _ndjson(rows: Sequence[Row]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_value, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _csv_value(value: Any) -> Any:
+    # Booleanos como en NDJSON (true/false) en lugar de True/False
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _value(value)
+
+
+def _csv(rows: Sequence[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows([map(_csv_value, row) for row in rows])
+    return buffer.getvalue()
+
+
+async def export_users(fmt: str) -> AsyncIterator[str]:
+    """
+    Serializa los usuarios no eliminados, un fragmento por lote del cursor.
+
+    Abre su propia sesión: el cuerpo de la respuesta se envía después de que
+    termina el endpoint y de que se cierra la sesión de la petición.
+
+    Args:
+        fmt: "ndjson" o "csv"
+
+    Yields:
+        Fragmentos del archivo exportado
+    """
+    serialize = _csv if fmt == "csv" else _ndjson
+    if fmt == "csv":
+        yield _csv([EXPORT_COLUMNS])
+    async with AsyncSessionLocal() as db:
+        async for rows in crud_user.stream_export(db, batch_size=settings.USERS_EXPORT_BATCH_SIZE):
+            yield serialize(rows)
@@ -0,0 +1,389 @@
+"""
+Importación masiva de usuarios.
+
+Registrar miles de usuarios con POST /users/ cuesta, por cada uno, una
+validación, un hash y varios round trips. La importación procesa un archivo
+CSV o NDJSON en streaming:
+
+1. Valida cada fila con las reglas de `UserCreate` y acumula los errores por
+   fila (incluidos los emails repetidos dentro del mismo archivo).
+2. Hashea las contraseñas en lotes, en paralelo en el pool de hashing,
+   mientras se sigue leyendo el archivo, y copia cada lote hasheado a una
+   tabla temporal (COPY con asyncpg) apenas termina: la memoria no crece con
+   el tamaño del archivo.
+3. Inserta las filas de la tabla temporal en `users` con un único
+   INSERT ... SELECT que omite los emails ya registrados.
+
+La carga, la inserción y un único registro de auditoría con el resumen se
+confirman en la misma transacción.
+
+Formato CSV: una cabecera con las columnas `full_name,email,password` y un
+usuario por registro (un campo entre comillas puede incluir saltos de línea).
+Formato NDJSON: un objeto JSON con esos campos por línea.
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Column, Integer, MetaData, String, Table, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from app.core.hashing import HashingOverloaded, hashing_executor
+from app.crud.audit import crud_audit
+from app.models.user import User
+from app.schemas.user import UserCreate, UserImportError, UserImportResult
+
+FORMATS = ("csv", "ndjson")
+
+# Tabla temporal de la transacción de importación (fuera de Base.metadata)
+staging_table = Table(
+    "users_import_staging",
+    MetaData(),
+    Column("id", UUID(as_uuid=True), nullable=False),
+    Column("row", Integer, nullable=False),
+    Column("full_name", String),
+    Column("email", String, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+# Fila validada y hasheada: (id, fila, full_name, email, hashed_password)
+StagedRecord = Tuple[uuid.UUID, int, Optional[str], str, str]
+
+HASHING_SATURATED = "password: el servicio de hashing está saturado; reintentar esta fila más tarde"
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Divide un flujo de bytes UTF-8 en líneas sin leerlo completo en memoria.
+
+    Cada línea conserva su fin de línea: dentro de un campo CSV entre comillas
+    es parte del valor.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def _parse_csv(lines: List[str]) -> Optional[List[str]]:
+    try:
+        return next(csv.reader(lines), [])
+    except csv.Error:
+        return None
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Optional[List[str]]]:
+    """
+    Agrupa las líneas en registros CSV y los interpreta.
+
+    Un registro termina en el primer fin de línea con las comillas cerradas
+    (cantidad par de `"`; las comillas escapadas `""` no cambian la paridad),
+    así un campo entre comillas puede contener saltos de línea.
+
+    Yields:
+        Valores del registro, o None si no se pudo interpretar
+    """
+    record: List[str] = []
+    quotes = 0
+    async for line in lines:
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield _parse_csv(record)
+            record, quotes = [], 0
+    if record:
+        yield _parse_csv(record)
+
+
+async def parse_rows(
+    chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Lee las filas de un archivo CSV o NDJSON.
+
+    Args:
+        chunks: Contenido del archivo en fragmentos
+        fmt: "csv" o "ndjson"
+
+    Yields:
+        Tuplas (número de fila, datos, error); datos es None si la fila no se pudo leer
+    """
+    row = 0
+    if fmt == "csv":
+        header: Optional[List[str]] = None
+        async for values in _iter_csv_records(_iter_lines(chunks)):
+            # Registros vacíos o solo con espacios
+            if values is not None and (not values or (len(values) == 1 and not values[0].strip())):
+                continue
+            if header is None:
+                header = [name.strip() for name in values or []]
+                continue
+            row += 1
+            if values is None:
+                yield row, None, "CSV inválido"
+                continue
+            if len(values) != len(header):
+                yield row, None, f"Se esperaban {len(header)} columnas y se encontraron {len(values)}"
+                continue
+            yield row, dict(zip(header, values)), None
+        return
+
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield row, None, "JSON inválido"
+            continue
+        if not isinstance(data, dict):
+            yield row, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield row, data, None
+
+
+def validate_row(data: Dict[str, Any]) -> Tuple[Optional[UserCreate], List[str]]:
+    """
+    Valida una fila con las mismas reglas que POST /users/.
+
+    Returns:
+        Tupla (usuario validado o None, mensajes de error)
+    """
+    try:
+        user_in = UserCreate(**data)
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()]
+    if not security.validate_password(user_in.password):
+        return None, ["password: no cumple los requisitos de complejidad"]
+    return user_in, []
+
+
+class HashingWait:
+    """
+    Espera de una importación ante un pool de hashing saturado.
+
+    La importación cede el pool a los logins mientras está saturado, pero no
+    espera indefinidamente: si pasan `max_wait` segundos sin hashear ningún
+    lote, los lotes que siguen rechazados se reportan como fallidos.
+    """
+
+    def __init__(self, max_wait: float):
+        self.max_wait = max_wait
+        self.last_progress = time.monotonic()
+
+    def progress(self) -> None:
+        """Registra un lote hasheado: reinicia el plazo."""
+        self.last_progress = time.monotonic()
+
+    async def wait(self, retry_after: float) -> bool:
+        """
+        Espera antes de reintentar un lote rechazado.
+
+        Returns:
+            False si se agotó el plazo y el lote no debe reintentarse
+        """
+        remaining = self.last_progress + self.max_wait - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(retry_after, remaining))
+        return True
+
+
+async def _hash_batch(
+    batch: List[Tuple[int, UserCreate]], wait: HashingWait
+) -> Tuple[List[StagedRecord], List[UserImportError]]:
+    passwords = [user_in.password for _, user_in in batch]
+    while True:
+        try:
+            hashes = await hashing_executor.run(security.get_password_hashes, passwords)
+            break
+        except HashingOverloaded as e:
+            # Ante una cola saturada la importación espera su turno, hasta el plazo
+            if not await wait.wait(e.retry_after):
+                return [], [
+                    UserImportError(row=row, email=user_in.email, errors=[HASHING_SATURATED])
+                    for row, user_in in batch
+                ]
+    wait.progress()
+    return [
+        (uuid.uuid4(), row, user_in.full_name, user_in.email, hashed)
+        for (row, user_in), hashed in zip(batch, hashes)
+    ], []
+
+
+async def _stage(conn: AsyncConnection, records: List[StagedRecord]) -> None:
+    """Copia un lote hasheado a la tabla temporal."""
+    if not records:
+        return
+    columns = [column.name for column in staging_table.columns]
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            staging_table.name, records=records, columns=columns
+        )
+    else:
+        await conn.execute(staging_table.insert(), [dict(zip(columns, record)) for record in records])
+
+
+async def _load(conn: AsyncConnection) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Inserta las filas de la tabla temporal en `users` y elimina la tabla.
+
+    Returns:
+        Tupla (usuarios insertados, (fila, email) de los emails ya registrados)
+    """
+    dialect_insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    staged = staging_table.c
+    statement = (
+        dialect_insert(User.__table__)
+        .from_select(
+            ["id", "full_name", "email", "hashed_password", "is_active", "is_admin"],
+            select(
+                staged.id, staged.full_name, staged.email, staged.hashed_password,
+                literal(True), literal(False),
+            ).order_by(staged.row),
+        )
+        # Mismo índice que POST /users/: ix_users_email (email) WHERE deleted_at IS NULL
+        .on_conflict_do_nothing(
+            index_elements=[User.__table__.c.email],
+            index_where=User.__table__.c.deleted_at.is_(None),
+        )
+    )
+    inserted = (await conn.execute(statement)).rowcount
+    # Las filas omitidas son las de la tabla temporal cuyo id no llegó a `users`
+    users = User.__table__.c
+    skipped = await conn.execute(
+        select(staged.row, staged.email)
+        .select_from(staging_table.outerjoin(User.__table__, users.id == staged.id))
+        .where(users.id.is_(None))
+        .order_by(staged.row)
+    )
+    skipped_rows = [tuple(row) for row in skipped]
+    await conn.run_sync(lambda sync_conn: staging_table.drop(sync_conn))
+    return inserted, skipped_rows
+
+
+async def import_users(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    *,
+    fmt: str,
+    performed_by: uuid.UUID,
+    hash_concurrency: Optional[int] = None
+) -> UserImportResult:
+    """
+    Importa usuarios desde un archivo CSV o NDJSON.
+
+    Args:
+        db: Sesión de la base de datos
+        chunks: Contenido del archivo en fragmentos
+        fmt: "csv" o "ndjson"
+        performed_by: Usuario que realiza la importación (auditoría)
+        hash_concurrency: Lotes de hashing en paralelo (por defecto IMPORT_HASH_CONCURRENCY)
+
+    Returns:
+        Resumen con los usuarios importados y los errores por fila
+    """
+    concurrency = hash_concurrency or settings.IMPORT_HASH_CONCURRENCY or max(
+        1, hashing_executor.max_concurrency // 2
+    )
+    errors: List[UserImportError] = []
+    # Solo el email y la fila de cada usuario válido: para los repetidos en el archivo
+    seen_emails: Dict[str, int] = {}
+    pending: Set[asyncio.Task] = set()
+    batch: List[Tuple[int, UserCreate]] = []
+    total = 0
+    wait = HashingWait(settings.IMPORT_HASH_MAX_WAIT_SECONDS)
+
+    conn = await db.connection()
+    await conn.run_sync(lambda sync_conn: staging_table.create(sync_conn))
+
+    async def collect(return_when: str) -> None:
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for task in done:
+            records, failed = task.result()
+            await _stage(conn, records)
+            errors.extend(failed)
+
+    async def flush_batch() -> None:
+        nonlocal batch
+        if len(pending) >= concurrency:
+            await collect(asyncio.FIRST_COMPLETED)
+        pending.add(asyncio.create_task(_hash_batch(batch, wait)))
+        batch = []
+
+    try:
+        async for row, data, error in parse_rows(chunks, fmt):
+            total += 1
+            if data is None:
+                errors.append(UserImportError(row=row, errors=[error]))
+                continue
+            user_in, row_errors = validate_row(data)
+            if user_in is None:
+                errors.append(UserImportError(row=row, email=data.get("email"), errors=row_errors))
+                continue
+            if user_in.email in seen_emails:
+                errors.append(UserImportError(
+                    row=row, email=user_in.email,
+                    errors=[f"email: repetido en el archivo (fila {seen_emails[user_in.email]})"],
+                ))
+                continue
+            seen_emails[user_in.email] = row
+            batch.append((row, user_in))
+            if len(batch) >= settings.IMPORT_HASH_BATCH_SIZE:
+                await flush_batch()
+        if batch:
+            await flush_batch()
+        if pending:
+            await collect(asyncio.ALL_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    inserted, skipped = await _load(conn)
+    for row, email in skipped:
+        errors.append(UserImportError(row=row, email=email, errors=["email: ya está registrado"]))
+    errors.sort(key=lambda error: error.row)
+
+    result = UserImportResult(
+        import_id=uuid.uuid4(),
+        total=total,
+        imported=inserted,
+        failed=len(errors),
+        errors=errors,
+    )
+    await crud_audit.create_log(
+        db,
+        action="import_users",
+        entity_type="user_import",
+        entity_id=result.import_id,
+        performed_by=performed_by,
+        details={
+            "format": fmt,
+            "total": result.total,
+            "imported": result.imported,
+            "failed": result.failed,
+        },
+        commit=False
+    )
+    await db.commit()
+    return result
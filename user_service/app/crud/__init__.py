@@ -1,4 +1,6 @@
 from .user import user as crud_user
 from .audit import crud_audit
+from .session import crud_session
+from .revocation import crud_revoked_token
 
-__all__ = ["crud_user", "crud_audit"]
+__all__ = ["crud_user", "crud_audit", "crud_session", "crud_revoked_token"]
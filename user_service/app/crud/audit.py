@@ -1,20 +1,22 @@
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
 from app.models.audit import AuditLog
 from app.schemas.audit import AuditLogCreate
 import uuid
 
 class CRUDAudit(CRUDBase[AuditLog, AuditLogCreate, None]):
-    def create_log(
+    async def create_log(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         action: str,
         entity_type: str,
         entity_id: uuid.UUID,
         performed_by: uuid.UUID,
-        details: Optional[Dict[str, Any]] = None
+        details: Optional[Dict[str, Any]] = None,
+        commit: bool = True
     ) -> AuditLog:
         audit_data = {
             "action": action,
@@ -25,11 +27,13 @@ class CRUDAudit(CRUDBase[AuditLog, AuditLogCreate, None]):
         }
         db_obj = AuditLog(**audit_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if commit:
+            await db.commit()
+            await db.refresh(db_obj)
         return db_obj
 
-    def get_all_logs(self, db: Session) -> List[AuditLog]:
-        return db.query(AuditLog).order_by(AuditLog.performed_at.desc()).all()
+    async def get_all_logs(self, db: AsyncSession) -> List[AuditLog]:
+        result = await self._read(db, select(AuditLog).order_by(AuditLog.performed_at.desc()))
+        return list(result.scalars().all())
 
 crud_audit = CRUDAudit(AuditLog)
@@ -5,25 +5,61 @@ Este módulo implementa un patrón Repository genérico que proporciona
 operaciones CRUD básicas para cualquier modelo. Se utiliza como clase
 base para implementaciones específicas de modelos.
 
+Todas las operaciones son asíncronas y reciben una AsyncSession, de modo que
+las esperas de la base de datos no bloquean el event loop. Las lecturas pasan
+por `_read`, que las envía a una réplica cuando hay réplicas configuradas.
+
+Las consultas frecuentes se construyen una sola vez (`_statement`) con
+parámetros `bindparam()`: reutilizar el mismo objeto evita reconstruir la
+expresión y recalcular su cache key en cada llamada, y SQLAlchemy reutiliza la
+consulta compilada (y asyncpg su prepared statement).
+
 Generic Types:
     ModelType: Tipo del modelo SQLAlchemy
     CreateSchemaType: Schema Pydantic para creación
     UpdateSchemaType: Schema Pydantic para actualización
 """
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import any_, bindparam, exc, inspect, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Result, Row
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ClauseElement, Executable
+from sqlalchemy.sql.visitors import InternalTraversal
 
-from app.core.database import Base
+from app.core.database import REPLICA_READ, Base, async_engine, replica_set
 
 ModelType = TypeVar("ModelType", bound=Any)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class Explain(Executable, ClauseElement):
+    """
+    `EXPLAIN (FORMAT JSON)` de una consulta (PostgreSQL).
+
+    La consulta se compila con sus bindparam: los valores viajan como
+    parámetros, igual que al ejecutarla, y la sentencia se cachea como
+    cualquier otra.
+    """
+
+    inherit_cache = True
+    _traverse_internals = [("statement", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, statement: Executable):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Clase base para operaciones CRUD (Create, Read, Update, Delete).
@@ -33,6 +69,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     Attributes:
         model: Clase del modelo SQLAlchemy
+        updatable_columns: Columnas que una actualización puede modificar
     """
     
     def __init__(self, model: Type[ModelType]):
@@ -43,8 +80,64 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             model: Clase del modelo SQLAlchemy para las operaciones CRUD
         """
         self.model = model
+        self._statements: Dict[Hashable, Executable] = {}
+        # Se calculan una vez desde el mapper, al crear el repositorio
+        self.updatable_columns = frozenset(
+            attr.key for attr in inspect(model).column_attrs
+            if not any(column.primary_key for column in attr.columns)
+        )
+
+    def _statement(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        """
+        Retorna la consulta `key`, construyéndola con `build` solo la primera vez.
+
+        Los valores de la consulta deben ser `bindparam()` y entregarse al ejecutarla.
+        """
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._statements[key] = build()
+        return statement
+
+    async def _read(
+        self,
+        db: AsyncSession,
+        statement: Executable,
+        params: Optional[Dict[str, Any]] = None,
+        *,
+        stream: bool = False,
+        execution_options: Optional[Dict[str, Any]] = None,
+    ) -> Union[Result, AsyncResult]:
+        """
+        Ejecuta una lectura en una réplica, o en el primario si la sesión ya escribió.
+
+        Si la conexión a la réplica falla, la réplica sale de la rotación y la
+        lectura se repite en el primario.
+
+        Args:
+            db: Sesión de la base de datos
+            statement: Consulta a ejecutar
+            params: Valores de los bindparam de la consulta
+            stream: Leer con un cursor del servidor (`AsyncSession.stream`)
+            execution_options: Opciones de ejecución (por ejemplo `yield_per`)
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
+        Returns:
+            Resultado de la consulta (un AsyncResult si `stream`)
+        """
+        execute = db.stream if stream else db.execute
+        options = execution_options or {}
+        db.info.pop("replica", None)
+        try:
+            return await execute(statement, params, execution_options=options, bind_arguments=REPLICA_READ)
+        except (exc.OperationalError, exc.InterfaceError, OSError):
+            replica = db.info.pop("replica", None)
+            if replica is None:
+                raise
+            replica_set.mark_failed(replica)
+            # La sesión no ha escrito (si no, no habría ido a la réplica)
+            await db.rollback()
+            return await execute(statement, params, execution_options=options)
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         """
         Obtiene un registro por su ID.
 
@@ -55,13 +148,68 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             El registro encontrado o None si no existe o está eliminado
         """
-        return db.query(self.model).filter(
-            self.model.id == id,
+        statement = self._statement("get", lambda: select(self.model).where(
+            self.model.id == bindparam("id"),
             self.model.deleted_at.is_(None)
-        ).first()
+        ))
+        result = await self._read(db, statement, {"id": id})
+        return result.scalars().first()
+
+    async def get_columns(self, db: AsyncSession, id: Any, columns: Tuple[str, ...]) -> Optional[Row]:
+        """
+        Obtiene solo algunas columnas de un registro por su ID.
+
+        La consulta lee únicamente esas columnas y el resultado es una fila, sin
+        construir un objeto del ORM.
 
-    def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        Args:
+            db: Sesión de la base de datos
+            id: Identificador único del registro
+            columns: Nombres de las columnas a leer
+
+        Returns:
+            La fila encontrada o None si no existe o está eliminado
+        """
+        statement = self._statement(("get", columns), lambda: select(*self._columns(columns)).where(
+            self.model.id == bindparam("id"),
+            self.model.deleted_at.is_(None)
+        ))
+        result = await self._read(db, statement, {"id": id})
+        return result.first()
+
+    def _columns(self, columns: Tuple[str, ...]) -> List[Any]:
+        """Atributos del modelo para una lista de nombres de columna."""
+        return [getattr(self.model, column) for column in columns]
+
+    async def get_many(self, db: AsyncSession, ids: Sequence[Any]) -> List[ModelType]:
+        """
+        Obtiene varios registros por sus IDs en una sola consulta.
+
+        En PostgreSQL la consulta es `id = ANY(:ids)` con un arreglo, de modo
+        que su texto (y su prepared statement) no cambia con la cantidad de IDs.
+
+        Args:
+            db: Sesión de la base de datos
+            ids: Identificadores a buscar
+
+        Returns:
+            Registros encontrados, sin los eliminados y sin un orden garantizado
+        """
+        if not ids:
+            return []
+
+        def build():
+            if async_engine.dialect.name == "postgresql":
+                id_filter = self.model.id == any_(bindparam("ids", type_=ARRAY(self.model.id.type)))
+            else:
+                id_filter = self.model.id.in_(bindparam("ids", expanding=True))
+            return select(self.model).where(id_filter, self.model.deleted_at.is_(None))
+
+        result = await self._read(db, self._statement("get_many", build), {"ids": list(ids)})
+        return list(result.scalars().all())
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
         """
         Obtiene múltiples registros con paginación.
@@ -74,9 +222,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Lista de registros encontrados
         """
-        return db.query(self.model).offset(skip).limit(limit).all()
+        statement = self._statement("get_multi", lambda: (
+            select(self.model).offset(bindparam("skip")).limit(bindparam("limit"))
+        ))
+        result = await self._read(db, statement, {"skip": skip, "limit": limit})
+        return list(result.scalars().all())
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
         Crea un nuevo registro.
 
@@ -90,13 +242,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
@@ -112,20 +264,92 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             El registro actualizado
         """
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in update_data.items():
+            if field in self.updatable_columns:
+                setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        expected: Optional[Dict[str, Sequence[Any]]] = None
+    ) -> Optional[ModelType]:
+        """
+        Actualiza un registro por su ID en un solo `UPDATE ... RETURNING`.
+
+        A diferencia de `update`, no necesita cargar el registro antes ni
+        volver a leerlo después. Los campos que no son columnas actualizables
+        se ignoran. Si ningún valor cambia no se escribe: las columnas con
+        `onupdate` (como `updated_at`) no se mueven y el registro se retorna
+        tal como está.
+
+        Args:
+            db: Sesión de la base de datos
+            id: Identificador único del registro
+            obj_in: Datos de actualización (schema o diccionario)
+            expected: Valores aceptados por columna; si el registro no tiene uno
+                de ellos no se actualiza (por ejemplo `updated_at` para If-Match)
+
+        Returns:
+            El registro actualizado, o None si no existe, está eliminado o no
+            tiene los valores de `expected`
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        values = {field: value for field, value in update_data.items() if field in self.updatable_columns}
+        if not values and not expected:
+            return await self.get(db, id=id)
+
+        expected = expected or {}
+        checked = tuple(sorted(expected))
+
+        def conditions() -> List[Any]:
+            return [
+                self.model.id == bindparam("pk"),
+                self.model.deleted_at.is_(None),
+                *(getattr(self.model, column).in_(bindparam(f"expected_{column}", expanding=True))
+                  for column in checked),
+            ]
+
+        params: Dict[str, Any] = {f"expected_{column}": list(expected[column]) for column in checked}
+        params["pk"] = id
+        current = self._statement(("get_expected", checked), lambda: select(self.model).where(*conditions()))
+        if not values:
+            return (await db.execute(current, params)).scalars().first()
+
+        # Los bindparam no pueden llamarse como las columnas del SET
+        columns = tuple(sorted(values))
+        statement = self._statement(("update", columns, checked), lambda: (
+            update(self.model)
+            .where(*conditions())
+            .where(or_(*(
+                getattr(self.model, column).is_distinct_from(bindparam(f"new_{column}"))
+                for column in columns
+            )))
+            .values({column: bindparam(f"new_{column}") for column in columns})
+            .returning(self.model)
+        ))
+        params.update({f"new_{column}": value for column, value in values.items()})
+        obj = (await db.execute(statement, params)).scalars().first()
+        if obj is None:
+            # Sin cambios que escribir (o sin registro): se lee tal como está
+            obj = (await db.execute(current, params)).scalars().first()
+        await db.commit()
+        return obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
         """
         Elimina un registro.
 
@@ -140,7 +364,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             Este método realiza una eliminación física. Para soft delete,
             las clases hijas deben sobrescribir este método.
         """
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
         return obj
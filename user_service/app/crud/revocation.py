@@ -0,0 +1,88 @@
+"""
+Módulo CRUD para la lista de revocación de tokens de acceso.
+
+Es la fuente de verdad que cada worker replica en memoria
+(ver `app.core.revocation`).
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_engine
+from app.crud.base import CRUDBase
+from app.models.revocation import RevokedToken
+
+
+class CRUDRevokedToken(CRUDBase[RevokedToken, None, None]):
+    """
+    CRUD para tokens revocados.
+
+    Extiende CRUDBase con:
+    - Revocación idempotente por jti
+    - Lectura incremental para refrescar las copias en memoria
+    - Barrido de revocaciones de tokens ya expirados
+    """
+
+    async def revoke(self, db: AsyncSession, *, jti: str, expires_at: datetime) -> None:
+        """
+        Revoca un token. Revocar dos veces el mismo jti no tiene efecto.
+
+        Args:
+            db: Sesión de la base de datos
+            jti: Identificador del token
+            expires_at: Expiración del token (la fila se elimina después)
+        """
+        dialect_insert = postgresql.insert if async_engine.dialect.name == "postgresql" else sqlite.insert
+        await db.execute(
+            dialect_insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        await db.commit()
+
+    async def is_revoked(self, db: AsyncSession, *, jti: str) -> bool:
+        """Consulta en la base de datos si un jti está revocado."""
+        result = await db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+        return result.first() is not None
+
+    async def get_revoked_since(
+        self, db: AsyncSession, *, since: Optional[datetime] = None
+    ) -> Tuple[List[Tuple[str, datetime]], datetime]:
+        """
+        Obtiene las revocaciones vigentes registradas desde un instante dado.
+
+        La hora se lee de la base de datos en la misma transacción que las
+        filas: es el mismo reloj que asigna `revoked_at`, sin depender del
+        reloj de este servidor.
+
+        Args:
+            db: Sesión de la base de datos
+            since: Instante (de la base de datos) desde el cual leer (None = todas)
+
+        Returns:
+            Tupla (lista de (jti, expires_at), hora de la base de datos al leer)
+        """
+        now = (await db.execute(select(func.now()))).scalar_one()
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > func.now()
+        )
+        if since is not None:
+            query = query.where(RevokedToken.revoked_at > since)
+        result = await db.execute(query)
+        return [tuple(row) for row in result.all()], now
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """Elimina las revocaciones de tokens que ya expiraron por sí solos."""
+        result = await db.execute(
+            delete(RevokedToken)
+            .where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+crud_revoked_token = CRUDRevokedToken(RevokedToken)
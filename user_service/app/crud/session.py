@@ -0,0 +1,150 @@
+"""
+Módulo CRUD para las sesiones de refresh tokens.
+
+Los refresh tokens son opacos y de un solo uso: cada renovación revoca la
+sesión presentada y emite una nueva de la misma familia. La búsqueda se hace
+por el digest del token, que tiene un índice único.
+"""
+
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models.session import RefreshSession
+
+
+def hash_refresh_token(token: str) -> str:
+    """Retorna el digest SHA-256 (hex) con el que se guarda un refresh token."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class CRUDSession(CRUDBase[RefreshSession, None, None]):
+    """
+    CRUD para sesiones de refresh tokens.
+
+    Extiende CRUDBase con:
+    - Emisión y rotación de tokens opacos
+    - Detección de reutilización (revoca la familia completa)
+    - Barrido de sesiones expiradas
+    """
+
+    async def create_session(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        family_id: Optional[uuid.UUID] = None,
+        commit: bool = True
+    ) -> Tuple[str, RefreshSession]:
+        """
+        Crea una sesión y retorna el token opaco asociado.
+
+        Args:
+            db: Sesión de la base de datos
+            user_id: Usuario dueño de la sesión
+            family_id: Familia de rotación (nueva si no se indica)
+            commit: Si se debe confirmar la transacción
+
+        Returns:
+            Tupla (token en texto plano, sesión creada). El token no se guarda.
+        """
+        token = secrets.token_urlsafe(32)
+        db_obj = RefreshSession(
+            token_hash=hash_refresh_token(token),
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4(),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        db.add(db_obj)
+        if commit:
+            await db.commit()
+            await db.refresh(db_obj)
+        return token, db_obj
+
+    async def get_by_token(self, db: AsyncSession, *, token: str) -> Optional[RefreshSession]:
+        """
+        Busca una sesión no expirada por su token (revocada o no).
+
+        Args:
+            db: Sesión de la base de datos
+            token: Refresh token en texto plano
+
+        Returns:
+            Sesión encontrada o None
+        """
+        result = await db.execute(
+            select(RefreshSession).where(
+                RefreshSession.token_hash == hash_refresh_token(token),
+                RefreshSession.expires_at > func.now()
+            )
+        )
+        return result.scalars().first()
+
+    async def rotate(self, db: AsyncSession, *, session: RefreshSession) -> Optional[str]:
+        """
+        Revoca la sesión presentada y emite un token nuevo en la misma familia.
+
+        La revocación es un UPDATE condicionado a `revoked_at IS NULL`, por lo
+        que si dos peticiones rotan el mismo token solo una lo consigue.
+
+        Returns:
+            El nuevo token, o None si la sesión ya había sido rotada
+        """
+        claimed = await db.execute(
+            update(RefreshSession)
+            .where(
+                RefreshSession.id == session.id,
+                RefreshSession.revoked_at.is_(None)
+            )
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        if not claimed.rowcount:
+            await db.rollback()
+            return None
+        token, _ = await self.create_session(
+            db, user_id=session.user_id, family_id=session.family_id, commit=False
+        )
+        await db.commit()
+        return token
+
+    async def revoke_family(self, db: AsyncSession, *, family_id: uuid.UUID) -> int:
+        """Revoca todas las sesiones activas de una familia de rotación."""
+        result = await db.execute(
+            update(RefreshSession)
+            .where(
+                RefreshSession.family_id == family_id,
+                RefreshSession.revoked_at.is_(None)
+            )
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """
+        Elimina las sesiones expiradas.
+
+        Las sesiones revocadas se conservan hasta su expiración para poder
+        detectar la reutilización de un token ya rotado.
+
+        Returns:
+            Número de sesiones eliminadas
+        """
+        result = await db.execute(
+            delete(RefreshSession)
+            .where(RefreshSession.expires_at <= datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+crud_session = CRUDSession(RefreshSession)
@@ -6,14 +6,54 @@ incluyendo manejo de contraseñas, búsqueda por email y soft delete.
 Extiende la funcionalidad base del CRUDBase.
 """
 
-from typing import Any, Dict, Optional, Union, List
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
-from app.models.user import User
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple, Union, List
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import async_engine
+from app.crud.base import CRUDBase, Explain
+from app.models.user import SEARCH_CONFIG, SEARCH_VECTOR, User, statement_timestamp
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
-from sqlalchemy import func
+from app.core.hashing import get_password_hash
+from sqlalchemy import ColumnElement, Float, Select, and_, bindparam, func, literal_column, or_, select, tuple_, update
+import json
+import re
 import uuid
+from datetime import datetime, timedelta
+
+# Clave (arbitraria) del advisory lock que serializa la eliminación de administradores
+ADMINS_LOCK_KEY = 7_301_001
+
+# Columnas de la exportación del directorio (nunca la contraseña hasheada)
+EXPORT_COLUMNS = ("id", "full_name", "email", "is_active", "is_admin", "created_at")
+
+# Carácter de escape para los comodines de LIKE en los términos de búsqueda
+LIKE_ESCAPE = "\\"
+
+
+def contains_pattern(term: str) -> str:
+    """
+    Patrón LIKE que busca `term` como texto literal en cualquier posición.
+
+    Los comodines escritos por el usuario (`%`, `_`) se escapan: un término como
+    "%" no filtraría nada y obligaría a recorrer todo el índice de trigramas.
+    """
+    escaped = (
+        term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+    return f"%{escaped}%"
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Palabras de una búsqueda, en minúsculas y sin repetir.
+
+    Solo se conservan letras y dígitos, así los términos se pueden usar
+    directamente en un `tsquery` sin escapar sus operadores (&, |, !, :*).
+    """
+    return list(dict.fromkeys(re.findall(r"[^\W_]+", q.lower())))
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """
@@ -24,8 +64,9 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     - Manejo seguro de contraseñas
     - Soft delete
     - Filtros de búsqueda avanzados
+    - Búsqueda de texto completo con ranking
     """
-    def get_user_by_email(self, db: Session, *, email: str) -> Optional[User]:
+    async def get_user_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
         """
         Busca un usuario por su correo electrónico.
 
@@ -36,12 +77,21 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         Returns:
             Usuario encontrado o None si no existe o está eliminado
         """
-        return db.query(User).filter(
-            User.email == email,
+        statement = self._statement("by_email", lambda: select(User).where(
+            User.email == bindparam("email"),
             User.deleted_at.is_(None)
-        ).first()
+        ))
+        result = await self._read(db, statement, {"email": email})
+        return result.scalars().first()
 
-    def create(self, db: Session, *, obj_in: UserCreate, is_admin: bool = False) -> User:
+    async def create(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: UserCreate,
+        is_admin: bool = False,
+        hashed_password: Optional[str] = None
+    ) -> User:
         """
         Crea un nuevo usuario.
 
@@ -49,27 +99,33 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             db: Sesión de la base de datos
             obj_in: Datos del nuevo usuario
             is_admin: Flag para crear usuario administrador (solo usado por el seeder)
+            hashed_password: Hash ya calculado de la contraseña (opcional)
 
         Returns:
             Usuario creado
 
         Note:
-            La contraseña se hashea automáticamente antes de guardarla
+            Si no se entrega hashed_password, la contraseña se hashea en el pool
+            de hashing antes de guardarla.
+            Un email duplicado no se verifica antes: el índice único parcial
+            ix_users_email lo rechaza con IntegrityError.
             El parámetro is_admin solo debe usarse desde el seeder
         """
+        if hashed_password is None:
+            hashed_password = await get_password_hash(obj_in.password)
         db_obj = User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=hashed_password,
             full_name=obj_in.full_name,
             is_admin=is_admin
         )
+        # Un solo INSERT ... RETURNING (eager_defaults); sin refresh posterior
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
         return db_obj
 
-    def update(
-        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
     ) -> User:
         """
         Actualiza un usuario existente.
@@ -83,70 +139,401 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             Usuario actualizado
 
         Note:
-            Si se actualiza la contraseña, se hashea automáticamente
+            Si se actualiza la contraseña, se hashea automáticamente en el pool
+            de hashing
         """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
         if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: uuid.UUID,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        updated_at: Optional[Sequence[datetime]] = None
+    ) -> Optional[User]:
+        """
+        Actualiza un usuario por su ID sin cargarlo antes.
+
+        Args:
+            db: Sesión de la base de datos
+            id: UUID del usuario
+            obj_in: Datos de actualización
+            updated_at: Versiones aceptadas del usuario (If-Match); con otra
+                versión no se actualiza
+
+        Returns:
+            Usuario actualizado, o None si no existe, está eliminado o su
+            versión no es una de `updated_at`
 
-    def get_multi(
+        Note:
+            Si se actualiza la contraseña, se hashea automáticamente en el pool
+            de hashing
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if update_data.get("password"):
+            update_data["hashed_password"] = await get_password_hash(update_data.pop("password"))
+        return await super().update_by_id(
+            db,
+            id=id,
+            obj_in=update_data,
+            expected={"updated_at": updated_at} if updated_at else None,
+        )
+
+    async def get_multi(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         skip: int = 0,
         limit: int = 100,
         full_name: str = None,
         email: str = None,
-        is_active: bool = None
-    ) -> List[User]:
+        is_active: bool = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Union[User, Row]]:
         """
-        Obtiene múltiples usuarios con filtros.
+        Obtiene múltiples usuarios con filtros, ordenados por (created_at, id).
 
         Args:
             db: Sesión de la base de datos
-            skip: Registros a saltar (paginación)
+            skip: Registros a saltar (paginación por offset, se mantiene por compatibilidad)
             limit: Límite de registros
+            full_name: Filtro por nombre (búsqueda parcial, índice ix_users_full_name_trgm)
+            email: Filtro por email (búsqueda parcial, índice ix_users_email_trgm)
+            is_active: Filtro por estado
+            after: Clave (created_at, id) del último usuario de la página anterior
+                (paginación por keyset, usa el índice ix_users_created_at_id)
+            columns: Columnas a leer; si se indican, solo se leen esas y se
+                retornan filas en lugar de objetos User
+
+        Returns:
+            Lista de usuarios (o filas) que cumplen los criterios
+        """
+        params = self._filter_params(full_name=full_name, email=email, is_active=is_active)
+        params.update({"skip": skip, "limit": limit})
+        if after is not None:
+            params["after_created_at"], params["after_id"] = after
+        # Una consulta precompilada por combinación de filtros presentes (y de columnas)
+        filters = tuple(sorted(params))
+        key = (filters, columns) if columns else filters
+        result = await self._read(db, self._statement(key, lambda: self._filtered_query(filters, columns)), params)
+        return list(result.all() if columns else result.scalars().all())
+
+    async def count(
+        self,
+        db: AsyncSession,
+        *,
+        mode: str = "exact",
+        cap: Optional[int] = None,
+        full_name: str = None,
+        email: str = None,
+        is_active: bool = None
+    ) -> Tuple[int, str]:
+        """
+        Cuenta los usuarios que cumplen los filtros de `get_multi`.
+
+        Modos:
+        - exact: `count(*)` sobre todas las filas que cumplen los filtros.
+        - capped: cuenta como máximo `cap` filas y se detiene ahí.
+        - estimated: estimación del planificador de PostgreSQL (EXPLAIN), sin
+          recorrer la tabla. Si la estimación no supera `cap`, contar es barato
+          y se cuenta con tope; en otras bases se cuenta con tope directamente.
+
+        Args:
+            db: Sesión de la base de datos
+            mode: "exact", "capped" o "estimated"
+            cap: Tope de los modos capped y estimated
             full_name: Filtro por nombre (búsqueda parcial)
             email: Filtro por email (búsqueda parcial)
             is_active: Filtro por estado
 
         Returns:
-            Lista de usuarios que cumplen los criterios
+            Tupla (cantidad, modo del resultado): "exact", "capped" si se llegó
+            al tope (hay al menos esa cantidad) o "estimated"
         """
-        query = db.query(self.model).filter(self.model.deleted_at.is_(None))
+        params = self._filter_params(full_name=full_name, email=email, is_active=is_active)
+        filters = tuple(sorted(params))
+        if mode == "estimated" and async_engine.dialect.name == "postgresql":
+            estimate = await self._estimate(db, filters, params)
+            if cap is None or estimate > cap:
+                return estimate, "estimated"
+        if mode == "exact" or cap is None:
+            statement = self._statement(("count",) + filters, lambda: (
+                select(func.count()).select_from(self.model).where(*self._filter_clauses(filters))
+            ))
+            return (await self._read(db, statement, params)).scalar_one(), "exact"
+
+        def build_capped():
+            # El LIMIT de la subconsulta detiene el recorrido al llegar al tope
+            limited = (
+                select(literal_column("1"))
+                .select_from(self.model)
+                .where(*self._filter_clauses(filters))
+                .limit(bindparam("cap"))
+                .subquery()
+            )
+            return select(func.count()).select_from(limited)
+
+        statement = self._statement(("count_capped",) + filters, build_capped)
+        total = (await self._read(db, statement, {**params, "cap": cap})).scalar_one()
+        return total, "capped" if total >= cap else "exact"
+
+    async def _estimate(self, db: AsyncSession, filters: Tuple[str, ...], params: Dict[str, Any]) -> int:
+        """Filas que el planificador estima para los filtros, según las estadísticas de la tabla."""
+        statement = self._statement(("estimate", filters), lambda: (
+            Explain(select(self.model.id).where(*self._filter_clauses(filters)))
+        ))
+        plan = (await self._read(db, statement, params)).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _filter_params(self, *, full_name: str = None, email: str = None, is_active: bool = None) -> Dict[str, Any]:
+        """Valores de los bindparam de los filtros presentes del listado."""
+        params: Dict[str, Any] = {}
         if full_name:
-            query = query.filter(self.model.full_name.ilike(f"%{full_name}%"))
+            params["full_name"] = contains_pattern(full_name)
         if email:
-            query = query.filter(self.model.email.ilike(f"%{email}%"))
+            params["email"] = contains_pattern(email)
         if is_active is not None:
-            query = query.filter(self.model.is_active == is_active)
-        return query.offset(skip).limit(limit).all()
+            params["is_active"] = is_active
+        return params
+
+    def _filter_clauses(self, filters: Tuple[str, ...]) -> List[ColumnElement]:
+        """Condiciones del listado con un bindparam por cada filtro presente."""
+        clauses = [self.model.deleted_at.is_(None)]
+        if "full_name" in filters:
+            clauses.append(self.model.full_name.ilike(bindparam("full_name"), escape=LIKE_ESCAPE))
+        if "email" in filters:
+            clauses.append(self.model.email.ilike(bindparam("email"), escape=LIKE_ESCAPE))
+        if "is_active" in filters:
+            clauses.append(self.model.is_active == bindparam("is_active"))
+        return clauses
+
+    def _filtered_query(self, filters: Tuple[str, ...], columns: Optional[Tuple[str, ...]] = None) -> Select:
+        """Construye el listado de usuarios con un bindparam por cada filtro."""
+        entities = self._columns(columns) if columns else [self.model]
+        query = select(*entities).where(*self._filter_clauses(filters))
+        if "after_id" in filters:
+            query = query.where(
+                tuple_(self.model.created_at, self.model.id)
+                > tuple_(
+                    bindparam("after_created_at", type_=self.model.created_at.type),
+                    bindparam("after_id", type_=self.model.id.type),
+                )
+            )
+        return (
+            query.order_by(self.model.created_at, self.model.id)
+            .offset(bindparam("skip"))
+            .limit(bindparam("limit"))
+        )
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        terms: Sequence[str],
+        limit: int = 20,
+        after: Optional[Tuple[float, uuid.UUID]] = None
+    ) -> List[Tuple[User, float]]:
+        """
+        Búsqueda de texto completo por nombre y email, ordenada por relevancia.
+
+        Cada término se busca como prefijo de una palabra ("jua" encuentra
+        "Juan") y deben aparecer todos. En PostgreSQL usa el índice GIN
+        ix_users_search_vector y ordena por `ts_rank`; en otras bases (desarrollo)
+        recurre a ILIKE sin ranking.
 
-    def remove(self, db: Session, *, id: uuid.UUID) -> User:
+        Args:
+            db: Sesión de la base de datos
+            terms: Palabras a buscar (ver `search_terms`)
+            limit: Límite de registros
+            after: Clave (relevancia, id) del último usuario de la página anterior
+                (paginación por keyset)
+
+        Returns:
+            Lista de tuplas (usuario, relevancia), de mayor a menor relevancia
+        """
+        params: Dict[str, Any] = {"limit": limit}
+        if async_engine.dialect.name == "postgresql":
+            params["query"] = " & ".join(f"{term}:*" for term in terms)
+        else:
+            params.update({f"term_{i}": contains_pattern(term) for i, term in enumerate(terms)})
+        if after is not None:
+            params["after_rank"], params["after_id"] = after
+        key = ("search",) + tuple(sorted(params))
+        result = await self._read(db, self._statement(key, lambda: self._search_query(key)), params)
+        return [(row[0], row[1]) for row in result.all()]
+
+    def _search_query(self, params: Tuple[str, ...]) -> Select:
+        """Construye la búsqueda de texto completo para los bindparam de `params`."""
+        if "query" in params:
+            tsquery = func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), bindparam("query"))
+            rank = func.ts_rank(SEARCH_VECTOR, tsquery, type_=Float)
+            match = [SEARCH_VECTOR.bool_op("@@")(tsquery)]
+        else:
+            rank = literal_column("0.0", Float)
+            searchable = func.coalesce(self.model.full_name, "") + " " + self.model.email
+            match = [
+                searchable.ilike(bindparam(name), escape=LIKE_ESCAPE)
+                for name in params if name.startswith("term_")
+            ]
+        ranked = rank.label("rank")
+        query = select(self.model, ranked).where(self.model.deleted_at.is_(None), *match)
+        if "after_id" in params:
+            after_rank = bindparam("after_rank", type_=Float)
+            query = query.where(or_(
+                rank < after_rank,
+                and_(rank == after_rank, self.model.id > bindparam("after_id", type_=self.model.id.type)),
+            ))
+        return query.order_by(ranked.desc(), self.model.id).limit(bindparam("limit"))
+
+    async def stream_export(self, db: AsyncSession, *, batch_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+        """
+        Recorre los usuarios no eliminados en lotes, con un cursor del servidor.
+
+        Solo se leen las columnas de EXPORT_COLUMNS, como filas y no como
+        objetos del ORM, y nunca hay más de un lote en memoria.
+
+        Args:
+            db: Sesión de la base de datos (queda ocupada hasta terminar el recorrido)
+            batch_size: Filas por lote
+
+        Yields:
+            Lotes de filas ordenadas por (created_at, id)
+        """
+        statement = self._statement("export", lambda: (
+            select(*(getattr(self.model, column) for column in EXPORT_COLUMNS))
+            .where(self.model.deleted_at.is_(None))
+            .order_by(self.model.created_at, self.model.id)
+        ))
+        result = await self._read(db, statement, stream=True, execution_options={"yield_per": batch_size})
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
+
+    async def get_version(self, db: AsyncSession, *, settle: float) -> Optional[datetime]:
+        """
+        Versión del listado de usuarios: la última modificación de cualquier usuario.
+
+        Toda escritura (alta, modificación, eliminación o importación) mueve
+        `updated_at`, así que el máximo cambia con cada una sin una fila
+        compartida que serialice las escrituras. Se lee del extremo de
+        ix_users_updated_at.
+
+        Una transacción que escribió antes que otra puede confirmarse después
+        sin mover el máximo. Por eso, mientras la última modificación tenga
+        menos de `settle` segundos, no hay versión y el listado no lleva ETag.
+
+        Args:
+            db: Sesión de la base de datos
+            settle: Antigüedad mínima de la última modificación, en segundos
+                (mayor que la transacción de escritura más larga)
+
+        Returns:
+            Fecha de la última modificación, o None si es reciente o no hay usuarios
+        """
+        statement = self._statement("version", lambda: (
+            select(func.max(self.model.updated_at), statement_timestamp())
+        ))
+        latest, now = (await self._read(db, statement)).one()
+        if latest is None or now - latest < timedelta(seconds=settle):
+            return None
+        return latest
+
+    async def count_active_admins(self, db: AsyncSession, *, limit: Optional[int] = None) -> int:
+        """
+        Cuenta los administradores no eliminados.
+
+        Usa el índice parcial ix_users_active_admins, que solo contiene a los
+        administradores. Se ejecuta en el primario: la comprobación del último
+        administrador debe ver las escrituras de la transacción en curso.
+
+        Args:
+            db: Sesión de la base de datos
+            limit: Deja de contar al llegar a esta cantidad (con 1 equivale a un EXISTS)
+
+        Returns:
+            Cantidad de administradores, como máximo `limit`
+        """
+        def build():
+            admins = (
+                select(literal_column("1"))
+                .select_from(self.model)
+                .where(self.model.is_admin, self.model.deleted_at.is_(None))
+            )
+            if limit is not None:
+                admins = admins.limit(bindparam("limit"))
+            return select(func.count()).select_from(admins.subquery())
+
+        statement = self._statement(("count_active_admins", limit is not None), build)
+        params = {"limit": limit} if limit is not None else None
+        return (await db.execute(statement, params)).scalar_one()
+
+    async def lock_admins(self, db: AsyncSession) -> None:
+        """
+        Serializa hasta el fin de la transacción los cambios que pueden dejar sin administradores.
+
+        Con el lock tomado, `count_active_admins` ve las eliminaciones ya
+        confirmadas por otras transacciones: dos administradores eliminados a la
+        vez no pueden ver cada uno al otro como el administrador que queda. En
+        PostgreSQL es un advisory lock de la transacción; SQLite ya serializa
+        las escrituras.
+        """
+        if async_engine.dialect.name == "postgresql":
+            await db.execute(select(func.pg_advisory_xact_lock(ADMINS_LOCK_KEY)))
+
+    async def remove(
+        self,
+        db: AsyncSession,
+        *,
+        id: uuid.UUID,
+        commit: bool = True,
+        updated_at: Optional[Sequence[datetime]] = None
+    ) -> Optional[User]:
         """
         Realiza un soft delete de un usuario.
 
+        Marca la fecha de eliminación y obtiene el usuario en un solo
+        `UPDATE ... RETURNING`, sin leerlo antes.
+
         Args:
             db: Sesión de la base de datos
             id: UUID del usuario a eliminar
+            commit: Si se debe confirmar la transacción (False para agregar
+                otras escrituras, como la auditoría, a la misma transacción)
+            updated_at: Versiones aceptadas del usuario (If-Match); con otra
+                versión no se elimina
 
         Returns:
-            Usuario marcado como eliminado
+            Usuario marcado como eliminado, o None si no existe, ya estaba
+            eliminado o su versión no es una de `updated_at`
 
         Note:
             No elimina físicamente el registro, solo marca la fecha de eliminación
         """
-        obj = db.query(self.model).get(id)
-        obj.deleted_at = func.now()
-        db.add(obj)
-        db.commit()
-        db.refresh(obj)
+        statement = update(User).where(User.id == id, User.deleted_at.is_(None))
+        if updated_at:
+            statement = statement.where(User.updated_at.in_(updated_at))
+        # updated_at se actualiza solo (onupdate del modelo)
+        result = await db.execute(statement.values(deleted_at=func.now()).returning(User))
+        obj = result.scalars().first()
+        if commit:
+            await db.commit()
         return obj
 
 user = CRUDUser(User)
@@ -1,12 +1,44 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.api.v1.api import api_router
+from app.api.v1.endpoints import well_known
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, engine, replica_set, Base
+from app.core.hashing import HashingOverloaded, hashing_executor
+from app.core.revocation import revocation_list
+from app.core.tasks import start_background_tasks, stop_background_tasks
 
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El pool de hashing se crea antes de que el worker empiece a atender peticiones
+    hashing_executor.start()
+    # Cargar la lista de revocación antes de aceptar peticiones
+    await revocation_list.refresh()
+    await replica_set.check()
+    tasks = start_background_tasks()
+    yield
+    await stop_background_tasks(tasks)
+    hashing_executor.shutdown()
+    await async_engine.dispose()
+    await replica_set.dispose()
+
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(well_known.router, prefix="/.well-known", tags=["auth"])
+
+@app.exception_handler(HashingOverloaded)
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio sobrecargado, intente nuevamente más tarde"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
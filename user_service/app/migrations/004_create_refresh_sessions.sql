@@ -0,0 +1,15 @@
+-- Sesiones de refresh tokens (solo se guarda el digest del token)
+CREATE TABLE IF NOT EXISTS refresh_sessions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    token_hash VARCHAR(64) NOT NULL,
+    user_id UUID NOT NULL REFERENCES users(id),
+    family_id UUID NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_refresh_sessions_token_hash ON refresh_sessions(token_hash);
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_user_id ON refresh_sessions(user_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_family_id ON refresh_sessions(family_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_expires_at ON refresh_sessions(expires_at);
@@ -0,0 +1,3 @@
+-- Orden estable (created_at, id) para el listado de usuarios y su paginación por keyset.
+-- CONCURRENTLY no bloquea las escrituras mientras se construye (no usar dentro de una transacción).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id ON users(created_at, id) WHERE deleted_at IS NULL;
@@ -0,0 +1,13 @@
+-- Búsqueda parcial (ILIKE '%texto%') por nombre y email en el listado de usuarios.
+-- Un índice B-tree no sirve para patrones con comodín inicial; los índices GIN de
+-- trigramas sí, incluso sin distinguir mayúsculas. Solo se indexan usuarios no eliminados.
+-- CONCURRENTLY no bloquea las escrituras mientras se construye (no usar dentro de una transacción).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_full_name_trgm
+    ON users USING gin (full_name gin_trgm_ops) WHERE deleted_at IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_trgm
+    ON users USING gin (email gin_trgm_ops) WHERE deleted_at IS NULL;
+
+-- El B-tree de full_name no lo usa ninguna consulta y solo encarece las escrituras
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_full_name;
@@ -0,0 +1,13 @@
+-- Búsqueda de texto completo por nombre y email (GET /users/search).
+-- search_vector es una columna generada: PostgreSQL la mantiene en cada INSERT/UPDATE.
+-- El nombre pesa más que el email (pesos A y B en el ranking); el email se separa en
+-- palabras ("juan.perez@perlametro.cl" -> juan, perez, perlametro, cl).
+-- Agregar una columna generada reescribe la tabla: ejecutar en una ventana de mantenimiento.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(full_name, '')), 'A')
+    || setweight(to_tsvector('simple', translate(coalesce(email, ''), '@.-_+', '     ')), 'B')
+) STORED;
+
+-- CONCURRENTLY no bloquea las escrituras mientras se construye (no usar dentro de una transacción).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_search_vector
+    ON users USING gin (search_vector) WHERE deleted_at IS NULL;
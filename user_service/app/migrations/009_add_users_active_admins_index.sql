@@ -0,0 +1,6 @@
+-- Administradores no eliminados, para comprobar que no se elimine al último.
+-- El índice solo contiene a los administradores, así que la comprobación no
+-- depende de la cantidad de usuarios.
+-- CONCURRENTLY no bloquea las escrituras mientras se construye (no usar dentro de una transacción).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_active_admins
+    ON users(id) WHERE is_admin AND deleted_at IS NULL;
@@ -0,0 +1,10 @@
+-- Última modificación de cada usuario (ETag de GET /users/{id} e If-Match en PUT/DELETE).
+-- Con un valor por defecto no volátil la columna se agrega sin reescribir la tabla.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+-- Las escrituras nuevas se marcan con la hora de su sentencia, no con la del inicio
+-- de su transacción (una importación larga queda marcada al insertar).
+ALTER TABLE users ALTER COLUMN updated_at SET DEFAULT statement_timestamp();
+
+-- Versión del listado (ETag de GET /users/): max(updated_at) se lee del extremo del índice.
+-- CONCURRENTLY no bloquea las escrituras mientras se construye (no usar dentro de una transacción).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_updated_at ON users(updated_at);
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime, text
+from app.core.database import Base
+
+class RevokedToken(Base):
+    """Token de acceso revocado antes de su expiración, identificado por su `jti`."""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"), index=True)
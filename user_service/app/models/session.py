@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+import uuid
+
+class RefreshSession(Base):
+    """
+    Sesión de refresh token.
+
+    Solo se guarda el digest SHA-256 del token opaco. Cada rotación revoca la
+    fila actual y crea otra en la misma familia; si se presenta un token ya
+    revocado se asume robo y se revoca toda la familia.
+    """
+    __tablename__ = "refresh_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
@@ -11,26 +11,100 @@ Attributes:
     hashed_password (str): Contraseña hasheada utilizando bcrypt
     is_active (bool): Estado del usuario en el sistema
     created_at (datetime): Fecha y hora de creación del usuario
+    updated_at (datetime): Fecha y hora de la última modificación del usuario
     deleted_at (datetime): Fecha y hora de eliminación suave del usuario
 """
 
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
+from sqlalchemy import DDL, Column, String, Boolean, DateTime, Index, event, literal_column, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from app.core.database import Base
 
+class current_timestamp(FunctionElement):
+    """
+    Fecha y hora actual del servidor de base de datos (inicio de la transacción).
+
+    En SQLite las fechas se guardan como texto y se comparan como texto:
+    CURRENT_TIMESTAMP no tiene fracción de segundo y no se ordena igual que
+    los valores con microsegundos que escribe SQLAlchemy (por ejemplo, el
+    cursor del listado). En SQLite se genera con el mismo formato.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+class statement_timestamp(FunctionElement):
+    """
+    Fecha y hora de inicio de la sentencia (no de la transacción).
+
+    Una escritura de una transacción larga (por ejemplo, una importación)
+    queda marcada cuando ocurre y no cuando empezó la transacción.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+@compiles(current_timestamp)
+def _current_timestamp(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(statement_timestamp)
+def _statement_timestamp(element, compiler, **kw):
+    return "statement_timestamp()"
+
+@compiles(current_timestamp, "sqlite")
+@compiles(statement_timestamp, "sqlite")
+def _current_timestamp_sqlite(element, compiler, **kw):
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Email único solo entre usuarios no eliminados (ver update_email_constraint.sql)
+        Index(
+            "ix_users_email", "email", unique=True,
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Orden estable del listado y paginación por keyset (ver 006_add_users_keyset_index.sql)
+        Index(
+            "ix_users_created_at_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Versión del listado: max(updated_at) (ver 010_add_users_updated_at.sql)
+        Index("ix_users_updated_at", "updated_at"),
+        # Comprobación del último administrador (ver 009_add_users_active_admins_index.sql)
+        Index(
+            "ix_users_active_admins", "id",
+            postgresql_where=text("is_admin AND deleted_at IS NULL"),
+            sqlite_where=text("is_admin = 1 AND deleted_at IS NULL"),
+        ),
+        # Búsqueda parcial por nombre y email con ILIKE (ver 007_add_users_trgm_indexes.sql)
+        Index(
+            "ix_users_full_name_trgm", "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+            postgresql_where=text("deleted_at IS NULL"),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_trgm", "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+            postgresql_where=text("deleted_at IS NULL"),
+        ).ddl_if(dialect="postgresql"),
+    )
+    # Los valores por defecto del servidor (created_at) se leen con RETURNING en el mismo INSERT
+    __mapper_args__ = {"eager_defaults": True}
 
     # Identificador único usando UUID v4 para mayor seguridad y distribución
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
-    # Nombre completo del usuario con índice para búsquedas eficientes
-    full_name = Column(String, index=True)
+    # Nombre completo del usuario (índice de trigramas en __table_args__)
+    full_name = Column(String)
     
-    # Correo electrónico con índice para búsquedas y unicidad
-    email = Column(String, index=True, nullable=False)
+    # Correo electrónico (índice único parcial en __table_args__)
+    email = Column(String, nullable=False)
     
     # Contraseña hasheada (nunca se almacena en texto plano)
     hashed_password = Column(String, nullable=False)
@@ -42,5 +116,48 @@ class User(Base):
     is_admin = Column(Boolean(), default=False, nullable=False)
     
     # Timestamps para auditoría
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=current_timestamp())
+    # Cambia con cada escritura (ETag del usuario y, con su máximo, del listado).
+    # Lo asigna el reloj de la base de datos, el mismo con que se compara
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False,
+        server_default=statement_timestamp(), onupdate=statement_timestamp(),
+    )
     deleted_at = Column(DateTime(timezone=True), nullable=True)  # Para soft delete
+
+
+# Los índices de trigramas necesitan la extensión pg_trgm antes de crear la tabla
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Configuración de texto de la búsqueda: sin stemming ni stopwords, adecuada para nombres
+SEARCH_CONFIG = "simple"
+
+# Vector de búsqueda por nombre (peso A) y email separado en palabras (peso B).
+# Es una columna generada solo en PostgreSQL (ver 008_add_users_search_vector.sql) y no
+# se mapea en el modelo: solo la usa la búsqueda y no se carga con cada usuario.
+SEARCH_VECTOR = literal_column("users.search_vector", TSVECTOR)
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(full_name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', translate(coalesce(email, ''), '@.-_+', '     ')), 'B')"
+)
+
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE users ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_users_search_vector ON users USING gin (search_vector) "
+        "WHERE deleted_at IS NULL"
+    ).execute_if(dialect="postgresql"),
+)
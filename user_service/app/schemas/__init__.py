@@ -1,3 +1,3 @@
-from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, UserBase, UserInDBBase
+from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, UserBase, UserInDBBase, UserBatchGetRequest, UserBatchGetResponse, UserImportError, UserImportResult
 
-__all__ = ["User", "UserCreate", "UserUpdate", "UserInDB", "UserBase", "UserInDBBase"]
+__all__ = ["User", "UserCreate", "UserUpdate", "UserInDB", "UserBase", "UserInDBBase", "UserBatchGetRequest", "UserBatchGetResponse", "UserImportError", "UserImportResult"]
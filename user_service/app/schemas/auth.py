@@ -3,6 +3,7 @@ Schemas para autenticación y respuestas relacionadas con sesión.
 """
 
 from pydantic import BaseModel
+from typing import List, Optional
 
 class LoginRequest(BaseModel):
     """Schema para la solicitud de inicio de sesión."""
@@ -13,13 +14,33 @@ class LoginResponse(BaseModel):
     """Schema para la respuesta de inicio de sesión exitoso."""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str
     user_id: str
     email: str
     is_admin: bool
 
+class RefreshRequest(BaseModel):
+    """Schema para la renovación del token de acceso."""
+    refresh_token: str
+
 class SessionInfo(BaseModel):
     """Schema para información de la sesión actual."""
     user_id: str
     email: str
     is_admin: bool
     expires_at: str
+
+class IntrospectRequest(BaseModel):
+    """Schema para la introspección de un lote de tokens."""
+    tokens: List[str]
+
+class TokenIntrospection(BaseModel):
+    """Resultado de la introspección de un token (mismo orden que la solicitud)."""
+    active: bool
+    sub: Optional[str] = None
+    is_admin: Optional[bool] = None
+    exp: Optional[int] = None
+
+class IntrospectResponse(BaseModel):
+    """Schema para la respuesta de introspección por lotes."""
+    results: List[TokenIntrospection]
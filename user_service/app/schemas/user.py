@@ -7,6 +7,8 @@ en la API de usuarios. Implementa diferentes schemas para diferentes operaciones
 - UserCreate: Para crear usuarios
 - UserUpdate: Para actualizar usuarios
 - User: Para respuestas de la API
+- UserBatchGetRequest/UserBatchGetResponse: Búsqueda de usuarios por lote de IDs
+- UserImportResult: Resumen de una importación masiva
 
 Cada schema implementa sus propias validaciones y transformaciones de datos.
 """
@@ -14,7 +16,7 @@ Cada schema implementa sus propias validaciones y transformaciones de datos.
 from pydantic import BaseModel, EmailStr, Field, validator
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import re
 
 class UserBase(BaseModel):
@@ -154,3 +156,33 @@ class UserInDB(UserInDBBase):
     pero nunca se expone en la API.
     """
     hashed_password: str
+
+class UserBatchGetRequest(BaseModel):
+    """Schema para buscar varios usuarios por ID."""
+    ids: List[uuid.UUID]
+
+class UserBatchGetResponse(BaseModel):
+    """
+    Usuarios encontrados en el orden de la solicitud y los IDs que no existen
+    (o están eliminados).
+    """
+    users: List[User]
+    missing: List[uuid.UUID]
+
+class UserImportError(BaseModel):
+    """Fila rechazada en una importación masiva."""
+    row: int
+    email: Optional[str] = None
+    errors: List[str]
+
+class UserImportResult(BaseModel):
+    """
+    Resumen de una importación masiva de usuarios.
+
+    Las filas se numeran desde 1 sin contar la cabecera del CSV.
+    """
+    import_id: uuid.UUID
+    total: int
+    imported: int
+    failed: int
+    errors: List[UserImportError]
@@ -0,0 +1,139 @@
+"""
+Benchmark del costo en Python de las consultas más frecuentes.
+
+Compara, para la búsqueda por id, la búsqueda por email y el listado filtrado,
+la forma anterior (construir la expresión `select()` en cada llamada) con las
+consultas precompiladas del CRUD. Se mide por separado:
+
+- Construcción: armar la consulta y calcular su cache key, que es lo que
+  SQLAlchemy hace antes de buscar la versión compilada.
+- Ejecución: la llamada completa sobre una base SQLite local, donde el costo
+  de I/O es mínimo y domina el trabajo en Python.
+
+Uso:
+    python -m app.scripts.bench_queries --iterations 5000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud import crud_user
+from app.models.user import User
+
+USERS = 200
+
+
+def per_call_us(fn: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def per_call_us_async(fn: Callable[[], Awaitable[object]], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(f"  {name:<20} {before:9.1f} us {after:9.1f} us {before / after:7.2f}x")
+
+
+async def run(iterations: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.__table__.create(sync_conn))
+        await conn.execute(User.__table__.insert(), [
+            {
+                "id": uuid.uuid4(),
+                "email": f"user{i}@perlametro.cl",
+                "full_name": f"Usuario {i}",
+                "hashed_password": "x",
+                "is_active": True,
+                "is_admin": False,
+            }
+            for i in range(USERS)
+        ])
+
+    async with AsyncSession(engine) as db:
+        user_id = (await db.execute(select(User.id).limit(1))).scalar_one()
+        email = f"user{USERS // 2}@perlametro.cl"
+
+        def by_id_before():
+            return select(User).where(User.id == user_id, User.deleted_at.is_(None))
+
+        def by_email_before():
+            return select(User).where(User.email == email, User.deleted_at.is_(None))
+
+        def filtered_before():
+            return (
+                select(User)
+                .where(User.deleted_at.is_(None))
+                .where(User.full_name.ilike("%usuario 1%"))
+                .where(User.is_active == True)  # noqa: E712
+                .offset(0)
+                .limit(20)
+            )
+
+        # Primera llamada para que el CRUD construya y SQLAlchemy compile sus consultas
+        await crud_user.get(db, id=user_id)
+        await crud_user.get_user_by_email(db, email=email)
+        await crud_user.get_multi(db, limit=20, full_name="usuario 1", is_active=True)
+
+        print(f"Construcción de la consulta + cache key ({iterations} iteraciones)")
+        print(f"  {'':<20} {'antes':>12} {'después':>12}")
+        for name, before, key in (
+            ("por id", by_id_before, "get"),
+            ("por email", by_email_before, "by_email"),
+            ("listado filtrado", filtered_before, ("full_name", "is_active", "limit", "skip")),
+        ):
+            cached = crud_user._statements[key]
+            report(
+                name,
+                per_call_us(lambda: before()._generate_cache_key(), iterations),
+                per_call_us(lambda: cached._generate_cache_key(), iterations),
+            )
+
+        print(f"\nEjecución completa en SQLite ({iterations} iteraciones)")
+        print(f"  {'':<20} {'antes':>12} {'después':>12}")
+        for name, before, after in (
+            ("por id", by_id_before,
+             lambda: crud_user.get(db, id=user_id)),
+            ("por email", by_email_before,
+             lambda: crud_user.get_user_by_email(db, email=email)),
+            ("listado filtrado", filtered_before,
+             lambda: crud_user.get_multi(db, limit=20, full_name="usuario 1", is_active=True)),
+        ):
+            async def execute_before(before=before):
+                return (await db.execute(before())).scalars().all()
+
+            report(
+                name,
+                await per_call_us_async(execute_before, iterations),
+                await per_call_us_async(after, iterations),
+            )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mide el costo en Python de las consultas frecuentes")
+    parser.add_argument("--iterations", type=int, default=5000,
+                        help="Llamadas por medición")
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
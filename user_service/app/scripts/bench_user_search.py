@@ -0,0 +1,180 @@
+"""
+Benchmark de la búsqueda parcial de usuarios con y sin índices de trigramas.
+
+Crea un esquema temporal en la base configurada (PostgreSQL) con usuarios
+sintéticos, mide el listado filtrado por nombre y por email (la misma consulta
+de GET /users/?full_name=...) sin los índices de trigramas y después de
+crearlos, y elimina el esquema al terminar. Para cada caso muestra la latencia
+mediana y los nodos de acceso del plan (Seq Scan, Bitmap Index Scan, ...).
+
+Uso:
+    python -m app.scripts.bench_user_search --users 1000000 --iterations 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.database import async_database_url
+from app.crud import crud_user
+from app.crud.user import contains_pattern
+from app.models.user import User
+
+SCHEMA = "bench_user_search"
+TRGM_INDEXES = [index for index in User.__table__.indexes if index.name.endswith("_trgm")]
+
+# Usuarios sintéticos: nombre + apellido comunes y un sufijo único, ~5% eliminados
+POPULATE = text("""
+INSERT INTO users (id, full_name, email, hashed_password, is_active, is_admin, created_at, deleted_at)
+SELECT
+    gen_random_uuid(),
+    (ARRAY['Ana','Juan','María','Pedro','Camila','José','Valentina','Diego','Fernanda','Matías'])[1 + i % 10]
+        || ' ' || (ARRAY['González','Muñoz','Rojas','Díaz','Pérez','Soto','Contreras','Silva','Martínez','Sepúlveda'])[1 + (i / 10) % 10]
+        || ' ' || substr(md5(i::text), 1, 8),
+    'usuario' || i || '@perlametro.cl',
+    'x',
+    true,
+    false,
+    now() - i * interval '1 second',
+    CASE WHEN i % 20 = 0 THEN now() END
+FROM generate_series(1, :users) AS i
+""")
+
+
+def cases(users: int) -> List[Dict[str, Any]]:
+    target = users // 2 + 1
+    return [
+        {"name": "nombre poco común", "full_name": hashlib.md5(str(target).encode()).hexdigest()[:8]},
+        {"name": "nombre común", "full_name": "gonzález"},
+        {"name": "email exacto", "email": f"usuario{target}@"},
+        {"name": "sin resultados", "email": "inexistente"},
+    ]
+
+
+def scan_nodes(plan: Dict[str, Any]) -> List[str]:
+    """Nodos del plan que leen la tabla o un índice."""
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        index = plan.get("Index Name")
+        nodes.append(f"{plan['Node Type']} ({index})" if index else plan["Node Type"])
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+async def explain(db: AsyncSession, case: Dict[str, Any]) -> str:
+    params = {field: contains_pattern(case[field]) for field in ("full_name", "email") if field in case}
+    query = (
+        crud_user._filtered_query(tuple(sorted(params)))
+        .params(**params)
+        .offset(0)
+        .limit(100)
+    )
+    sql = query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return ", ".join(scan_nodes(plan[0]["Plan"]))
+
+
+async def measure(engine: AsyncEngine, users: int, iterations: int) -> Dict[str, float]:
+    results = {}
+    async with AsyncSession(engine) as db:
+        for case in cases(users):
+            filters = {field: case[field] for field in ("full_name", "email") if field in case}
+            # Primera llamada fuera de la medición (prepared statement y caché de páginas)
+            found = len(await crud_user.get_multi(db, limit=100, **filters))
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await crud_user.get_multi(db, limit=100, **filters)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[case["name"]] = statistics.median(timings)
+            print(f"  {case['name']:<20} {results[case['name']]:9.2f} ms  "
+                  f"{found:>3} filas  {await explain(db, case)}")
+    return results
+
+
+async def run(url: str, users: int, iterations: int) -> int:
+    if make_url(url).get_driver_name() != "asyncpg":
+        print("El benchmark requiere PostgreSQL con asyncpg", file=sys.stderr)
+        return 1
+
+    # Todas las tablas sin esquema explícito se resuelven en el esquema del benchmark
+    engine = create_async_engine(
+        url, connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}}
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public"))
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.run_sync(lambda sync_conn: User.__table__.create(sync_conn))
+            for index in TRGM_INDEXES:
+                await conn.run_sync(lambda sync_conn, index=index: index.drop(sync_conn))
+
+        print(f"Cargando {users} usuarios...")
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.execute(POPULATE, {"users": users})
+            await conn.execute(text("ANALYZE users"))
+        print(f"  {time.perf_counter() - start:.1f} s")
+
+        print(f"\nSin índices de trigramas (mediana de {iterations} llamadas)")
+        before = await measure(engine, users, iterations)
+
+        print("\nCreando índices de trigramas...")
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            for index in TRGM_INDEXES:
+                await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn))
+            await conn.execute(text("ANALYZE users"))
+            for index in TRGM_INDEXES:
+                size = (await conn.execute(
+                    text("SELECT pg_size_pretty(pg_relation_size(CAST(:name AS regclass)))"),
+                    {"name": f"{SCHEMA}.{index.name}"},
+                )).scalar_one()
+                print(f"  {index.name}: {size}")
+        print(f"  {time.perf_counter() - start:.1f} s")
+        # Conexiones nuevas: sin prepared statements planificados antes de los índices
+        await engine.dispose()
+
+        print(f"\nCon índices de trigramas (mediana de {iterations} llamadas)")
+        after = await measure(engine, users, iterations)
+
+        print("\nResumen")
+        print(f"  {'':<20} {'antes':>10} {'después':>10}")
+        for name in before:
+            print(f"  {name:<20} {before[name]:7.2f} ms {after[name]:7.2f} ms "
+                  f"{before[name] / after[name]:7.1f}x")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Mide la búsqueda parcial de usuarios con y sin índices de trigramas"
+    )
+    parser.add_argument("--url", help="URL de PostgreSQL (por defecto, la de la configuración)")
+    parser.add_argument("--users", type=int, default=1_000_000, help="Usuarios sintéticos")
+    parser.add_argument("--iterations", type=int, default=20, help="Llamadas por medición")
+    args = parser.parse_args()
+    url = async_database_url(args.url or settings.ASYNC_DATABASE_URL or settings.DATABASE_URL)
+    sys.exit(asyncio.run(run(url, args.users, args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Calibración del costo de hashing de contraseñas.
+
+Mide en el hardware actual cuánto tarda verificar una contraseña con distintos
+parámetros de bcrypt y argon2, y recomienda el costo más alto que no supera la
+latencia objetivo de verificación.
+
+Uso:
+    python -m app.scripts.calibrate_hashing --target-ms 250
+
+Las recomendaciones se aplican con las variables BCRYPT_ROUNDS, ARGON2_* y
+PASSWORD_SCHEMES; los hashes existentes se migran solos al iniciar sesión.
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from passlib.context import CryptContext
+
+SAMPLE_PASSWORD = "Calibracion123!"
+
+
+def measure_verify_ms(context: CryptContext, samples: int) -> float:
+    """Retorna la mediana (en ms) de verificar un hash con el contexto dado."""
+    hashed = context.hash(SAMPLE_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify(SAMPLE_PASSWORD, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+    name: str,
+    candidates: List[Tuple[str, Callable[[], CryptContext]]],
+    target_ms: float,
+    samples: int
+) -> Optional[str]:
+    """
+    Mide los candidatos en orden creciente de costo y se detiene al superar el objetivo.
+
+    Returns:
+        Parámetros del candidato más costoso dentro del objetivo, o None
+    """
+    print(f"\n{name}")
+    best = None
+    for params, build in candidates:
+        elapsed = measure_verify_ms(build(), samples)
+        within = elapsed <= target_ms
+        print(f"  {params:<45} {elapsed:8.1f} ms {'✓' if within else '✗'}")
+        if not within:
+            break
+        best = params
+    return best
+
+
+def bcrypt_candidates() -> List[Tuple[str, Callable[[], CryptContext]]]:
+    return [
+        (f"BCRYPT_ROUNDS={rounds}",
+         lambda rounds=rounds: CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds))
+        for rounds in range(10, 17)
+    ]
+
+
+def argon2_candidates(memory_cost: int, parallelism: int) -> List[Tuple[str, Callable[[], CryptContext]]]:
+    return [
+        (f"ARGON2_TIME_COST={time_cost} ARGON2_MEMORY_COST={memory_cost}",
+         lambda time_cost=time_cost: CryptContext(
+             schemes=["argon2"],
+             argon2__time_cost=time_cost,
+             argon2__memory_cost=memory_cost,
+             argon2__parallelism=parallelism,
+         ))
+        for time_cost in range(1, 11)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibra el costo de hashing de contraseñas")
+    parser.add_argument("--target-ms", type=float, default=250.0,
+                        help="Latencia objetivo de una verificación, en ms")
+    parser.add_argument("--samples", type=int, default=5,
+                        help="Mediciones por candidato")
+    parser.add_argument("--argon2-memory-cost", type=int, default=65536,
+                        help="Memoria de argon2 en KiB")
+    parser.add_argument("--argon2-parallelism", type=int, default=4,
+                        help="Hilos de argon2")
+    args = parser.parse_args()
+
+    print(f"Objetivo: verificación en <= {args.target_ms} ms ({args.samples} muestras)")
+    results: Dict[str, Optional[str]] = {
+        "bcrypt": calibrate("bcrypt", bcrypt_candidates(), args.target_ms, args.samples)
+    }
+
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        print("\nargon2: no disponible (instalar argon2-cffi para evaluarlo)")
+    else:
+        results["argon2"] = calibrate(
+            "argon2",
+            argon2_candidates(args.argon2_memory_cost, args.argon2_parallelism),
+            args.target_ms,
+            args.samples,
+        )
+
+    print("\nRecomendación:")
+    for scheme, params in results.items():
+        if params is None:
+            print(f"  {scheme}: ningún parámetro cumple el objetivo")
+        else:
+            print(f"  {scheme}: {params}")
+    if results.get("argon2"):
+        print('  Para migrar a argon2: PASSWORD_SCHEMES=["argon2", "bcrypt"]')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Generación de claves de firma RSA para los tokens JWT.
+
+Escribe una clave privada PEM nueva en el directorio de claves (JWT_KEYS_DIR).
+El archivo se nombra con la fecha UTC de creación, así la clave más nueva es
+la última en orden alfabético y pasa a firmar los tokens nuevos salvo que
+JWT_ACTIVE_KID indique otra (ver app/core/keys.py para la rotación).
+
+Uso:
+    python -m app.scripts.generate_jwt_key --dir /run/secrets/jwt-keys
+    python -m app.scripts.generate_jwt_key --dir keys --if-missing
+
+Todos los workers y réplicas del servicio deben leer el mismo directorio.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def generate(keys_dir: str, key_size: int) -> str:
+    """Crea una clave privada nueva y retorna la ruta del archivo."""
+    os.makedirs(keys_dir, exist_ok=True)
+    path = os.path.join(keys_dir, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".pem")
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    # Solo el dueño puede leer la clave; O_EXCL evita pisar una clave existente
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera una clave RSA de firma de tokens JWT")
+    parser.add_argument("--dir", default=os.environ.get("JWT_KEYS_DIR"),
+                        help="Directorio de claves (por defecto, JWT_KEYS_DIR)")
+    parser.add_argument("--key-size", type=int, default=2048, help="Tamaño de la clave en bits")
+    parser.add_argument("--if-missing", action="store_true",
+                        help="No generar si el directorio ya tiene alguna clave")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("Indica --dir o define JWT_KEYS_DIR")
+
+    if args.if_missing and os.path.isdir(args.dir) and any(
+        filename.endswith(".pem") for filename in os.listdir(args.dir)
+    ):
+        print(f"{args.dir} ya tiene claves; no se genera otra")
+        sys.exit(0)
+    print(f"Clave generada: {generate(args.dir, args.key_size)}")
+
+
+if __name__ == "__main__":
+    main()
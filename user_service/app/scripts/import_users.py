@@ -0,0 +1,84 @@
+"""
+Importación masiva de usuarios desde la línea de comandos.
+
+Usa el mismo proceso que POST /users/import, pero con todo el pool de hashing
+del proceso disponible para la importación.
+
+Uso:
+    python -m app.scripts.import_users usuarios.csv --performed-by admin@perlametro.cl
+    python -m app.scripts.import_users usuarios.ndjson --performed-by admin@perlametro.cl
+
+El formato se deduce de la extensión (.csv o .ndjson/.jsonl) o se indica con --format.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.hashing import hashing_executor
+from app.core.user_import import FORMATS, import_users
+from app.crud import crud_user
+
+CHUNK_SIZE = 1024 * 1024
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+async def read_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def run(path: str, fmt: str, performed_by: str, max_errors: int) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            admin = await crud_user.get_user_by_email(db, email=performed_by)
+            if admin is None or not admin.is_admin:
+                print(f"{performed_by} no es un administrador activo", file=sys.stderr)
+                return 1
+            result = await import_users(
+                db,
+                read_chunks(path),
+                fmt=fmt,
+                performed_by=admin.id,
+                hash_concurrency=hashing_executor.max_concurrency,
+            )
+    finally:
+        await async_engine.dispose()
+        hashing_executor.shutdown()
+
+    print(f"Importación {result.import_id}: {result.imported} importados, "
+          f"{result.failed} con errores, {result.total} filas")
+    for error in result.errors[:max_errors]:
+        print(f"  fila {error.row} ({error.email or '-'}): {'; '.join(error.errors)}")
+    if result.failed > max_errors:
+        print(f"  ... y {result.failed - max_errors} errores más")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa usuarios desde un archivo CSV o NDJSON")
+    parser.add_argument("path", help="Archivo a importar")
+    parser.add_argument("--performed-by", required=True,
+                        help="Email del administrador que figura en la auditoría")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="Formato del archivo (por defecto, según la extensión)")
+    parser.add_argument("--max-errors", type=int, default=50,
+                        help="Errores por fila a mostrar")
+    args = parser.parse_args()
+
+    fmt = args.format or next(
+        (fmt for ext, fmt in EXTENSIONS.items() if args.path.lower().endswith(ext)), None
+    )
+    if fmt is None:
+        parser.error("no se pudo deducir el formato; usar --format")
+    sys.exit(asyncio.run(run(args.path, fmt, args.performed_by, args.max_errors)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,18 @@
-from app.core.database import SessionLocal, engine, Base
+import asyncio
+
+from app.core.database import AsyncSessionLocal, async_engine, engine, Base
+from app.core.hashing import hashing_executor
 from app.crud.user import user
 from app.schemas.user import UserCreate
 import logging
 
-def seed_data():
+async def seed_data():
     """Seed the database with initial data."""
-    db = SessionLocal()
+    # Recrear las tablas para empezar desde cero (DDL con el engine síncrono)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = AsyncSessionLocal()
     try:
-        # Recrear las tablas para empezar desde cero
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
-        
         users = [
             UserCreate(
                 full_name="Admin User",
@@ -28,7 +30,7 @@ def seed_data():
         for i, user_in in enumerate(users):
             # El primer usuario (Admin User) será administrador
             is_admin = i == 0
-            user.create(db, obj_in=user_in, is_admin=is_admin)
+            await user.create(db, obj_in=user_in, is_admin=is_admin)
             print(f"Created user: {user_in.email} (admin: {is_admin})")
         
         print("Database seeded successfully!")
@@ -36,7 +38,9 @@ def seed_data():
         print(f"Error seeding database: {e}")
         raise
     finally:
-        db.close()
+        await db.close()
+        await async_engine.dispose()
+        hashing_executor.shutdown()
 
 if __name__ == "__main__":
-    seed_data()
+    asyncio.run(seed_data())